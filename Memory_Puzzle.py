@@ -3,20 +3,32 @@
 # http://inventwithpython.com/pygame
 # Released under a 'Simplified BSD' license
 
-import random, pygame, sys
+import argparse, random, pygame, sys
 from pygame.locals import *
 
 FPS = 30  # frames per second, the general speed of the program
 WINDOW_WIDTH = 640  # size of the window's width in pixels
 WINDOW_HEIGHT = 480  # size of window's height in pixels
-REVEAL_SPEED = 8  # # speed of boxes' sliding reveals and covers
+REVEAL_TIME = 200  # milliseconds a box's sliding reveal or cover takes
+MISMATCH_TIME = 1000  # milliseconds two boxes that don't match stay open
+WON_FLASHES = 13  # times the background color changes when the player has won
+WON_FLASH_TIME = 300  # milliseconds each background color is shown for
+WON_TIME = WON_FLASHES * WON_FLASH_TIME + 2000  # milliseconds from winning until the next board
+NEW_BOARD_TIME = 1000  # milliseconds a new board is shown unrevealed before its start animation
 BOX_SIZE = 40  # size of the box height and width in pixels
 GAP_SIZE = 10  # size of gap between boxes in pixels
 BOARD_WIDTH = 10  # number of columns of icons
 BOARD_HEIGHT = 7  # number of rows of icons
+HIGHLIGHT_MARGIN = 5  # how far the highlight border reaches out from a box, in pixels
+DIRTY_RECT_RENDERING = True  # redraw only the boxes that changed each frame, not the whole window
+ZOOM_BOX_SIZES = (20, 30, 40, 60, 80)  # box sizes the view can be zoomed between
+SCROLL_SPEED = 15  # pixels the view scrolls each frame an arrow key is held down
+MAX_CACHED_SPRITES = 2000  # sprites kept before the sprite cache is emptied
 assert(BOARD_WIDTH * BOARD_HEIGHT) % 2 == 0, 'Board needs to have an even number of boxes for pairs of matches.'
 XMARGIN = int((WINDOW_WIDTH - (BOARD_WIDTH * (BOX_SIZE + GAP_SIZE))) / 2)
 YMARGIN = int((WINDOW_HEIGHT - (BOARD_HEIGHT * (BOX_SIZE + GAP_SIZE))) / 2)
+VIEW_X = 0  # how far the view of a board too big for the window is scrolled right, in pixels
+VIEW_Y = 0  # how far the view of a board too big for the window is scrolled down, in pixels
 
 #             R    G    B
 GRAY      = (100, 100, 100)
@@ -43,10 +55,29 @@ OVAL = 'oval'
 
 ALL_COLORS = (RED, GREEN, BLUE, YELLOW, ORANGE, PURPLE, CYAN)
 ALL_SHAPES = (DONUT, SQUARE, DIAMOND, LINES, OVAL)
-assert len(ALL_COLORS) * len(ALL_SHAPES) * 2 >= BOARD_WIDTH * BOARD_HEIGHT, 'Board is too big for the number of shapes/colors defined.'
+
+COLORKEY = (1, 2, 3)  # color of the see-through parts of sprites; used nowhere else
+BLACK = (0, 0, 0)  # background of the number marking icons past the first set
+SPRITE_CACHE = {}  # (shape, color, mark) icon, 'cover' or 'highlight' -> the Surface to blit for it
+MARK_FONTS = {}  # font size -> the Font marks are drawn with
+SPRITE_CACHE_KEY = None  # the box size and colors the cached sprites were drawn with
 
 def main():
     global FPS_CLOCK, DISPLAY_SURFACE
+    parser = argparse.ArgumentParser(description='Memory Puzzle, a game of finding the pairs of matching icons.')
+    parser.add_argument('--width', type=int, default=BOARD_WIDTH,
+                        help=f'columns of boxes on the board (default {BOARD_WIDTH})')
+    parser.add_argument('--height', type=int, default=BOARD_HEIGHT,
+                        help=f'rows of boxes on the board (default {BOARD_HEIGHT})')
+    parser.add_argument('--box-size', type=int, choices=ZOOM_BOX_SIZES, default=BOX_SIZE,
+                        help=f'starting size of the boxes in pixels (default {BOX_SIZE})')
+    args = parser.parse_args()
+    try:
+        setBoardSize(args.width, args.height)
+    except ValueError as error:
+        parser.error(str(error))
+    setBoxSize(args.box_size)
+
     pygame.init()
     FPS_CLOCK = pygame.time.Clock()
     DISPLAY_SURFACE = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
@@ -58,16 +89,21 @@ def main():
     mainBoard = getRandomizedBoard()
     revealedBoxes = generateRevealedBoxesData(False)
 
+    boxTweens = {}  # the (x, y) of boxes sliding open or shut -> their queued tweens.
+
     firstSelection = None  # stores the (x, y) of the first box clicked.
+    highlightedBox = None  # stores the (x, y) of the box drawn with a highlight.
+    wonTime = None  # stores the time the win animation starts, once all pairs are found.
+    bgColor = BG_COLOR  # the background color the window was last drawn with.
+    fullRedraw = True  # set when the whole window needs drawing again.
 
-    DISPLAY_SURFACE.fill(BG_COLOR)
-    startGameAnimation(mainBoard)
+    startGameAnimation(mainBoard, boxTweens, pygame.time.get_ticks())
 
     while True:  # main game loop
+        now = pygame.time.get_ticks()
         mouseClicked = False
-
-        DISPLAY_SURFACE.fill(BG_COLOR)  # drawing the window
-        drawBoard(mainBoard, revealedBoxes)
+        viewMoved = False  # set when the view has been scrolled or zoomed this frame.
+        dirtyBoxes = set()  # the (x, y) of boxes that need drawing again this frame.
 
         for event in pygame.event.get():  # event handling loop
             if event.type == QUIT or (event.type == KEYUP and event.key == K_ESCAPE):
@@ -77,15 +113,34 @@ def main():
                 mousex, mousey = event.pos
             elif event.type == MOUSEBUTTONUP:
                 mousex, mousey = event.pos
-                mouseClicked = True
+                mouseClicked = mouseClicked or event.button in (1, 2, 3)  # buttons 4 and up are the wheel
+            elif event.type == MOUSEWHEEL:
+                # The wheel scrolls the view, or zooms it when Ctrl is held down.
+                if pygame.key.get_mods() & KMOD_CTRL:
+                    viewMoved = zoomView(event.y, mousex, mousey) or viewMoved
+                else:
+                    step = BOX_SIZE + GAP_SIZE
+                    viewMoved = scrollView(event.x * step, -event.y * step) or viewMoved
+            elif event.type == KEYUP and event.key in (K_EQUALS, K_PLUS, K_KP_PLUS):
+                viewMoved = zoomView(1, mousex, mousey) or viewMoved
+            elif event.type == KEYUP and event.key in (K_MINUS, K_KP_MINUS):
+                viewMoved = zoomView(-1, mousex, mousey) or viewMoved
+
+        # Scroll the view while the arrow keys are held down.
+        keys = pygame.key.get_pressed()
+        scrollx = keys[K_RIGHT] - keys[K_LEFT]
+        scrolly = keys[K_DOWN] - keys[K_UP]
+        if scrollx or scrolly:
+            viewMoved = scrollView(scrollx * SCROLL_SPEED, scrolly * SCROLL_SPEED) or viewMoved
+        if viewMoved:
+            fullRedraw = True
 
         boxx, boxy = getBoxAtPixel(mousex, mousey)
         if boxx != None and boxy != None:
             # The mouse is currently over a box.
-            if not revealedBoxes[boxx][boxy]:
-                drawHighlightBox(boxx, boxy)
-            if not revealedBoxes[boxx][boxy] and mouseClicked:
-                revealBoxesAnimation(mainBoard, [(boxx, boxy)])
+            # Boxes that are still sliding open or shut can't be clicked.
+            if not revealedBoxes[boxx][boxy] and (boxx, boxy) not in boxTweens and mouseClicked:
+                revealBoxesAnimation(boxTweens, [(boxx, boxy)], now)
                 revealedBoxes[boxx][boxy] = True  # set the box as 'revealed'
                 if firstSelection == None:  # the current box was the first box clicked
                     firstSelection = (boxx, boxy)
@@ -93,32 +148,56 @@ def main():
                     # Check if there is a march between the two icons.
                     icon1shape, icon1color = getShapeAndColor(mainBoard, firstSelection[0], firstSelection[1])
                     icon2shape, icon2color = getShapeAndColor(mainBoard, boxx, boxy)
-
-                    if icon1shape != icon2shape or icon1color != icon2color:
-                        # Icons don't match. Re-cover up both selections.
-                        pygame.time.wait(1000)  # 1000 milliseconds = 1 sec
-                        coverBoxesAnimation(mainBoard, [(firstSelection[0], firstSelection[1]), (boxx, boxy)])
+                    icon1mark = getMark(mainBoard, firstSelection[0], firstSelection[1])
+                    icon2mark = getMark(mainBoard, boxx, boxy)
+
+                    if icon1shape != icon2shape or icon1color != icon2color or icon1mark != icon2mark:
+                        # Icons don't match. Re-cover up both selections once
+                        # they've been open for MISMATCH_TIME; the player can
+                        # carry on clicking other boxes in the meantime.
+                        coverBoxesAnimation(boxTweens, [firstSelection, (boxx, boxy)], now + REVEAL_TIME + MISMATCH_TIME)
                         revealedBoxes[firstSelection[0]][firstSelection[1]] = False
                         revealedBoxes[boxx][boxy] = False
                     elif hasWon(revealedBoxes):  # check if all pairs have been found
-                        gameWonAnimation(mainBoard)
-                        pygame.time.wait(2000)
-
-                        # Reset the board.
-                        mainBoard = getRandomizedBoard()
-                        revealedBoxes = generateRevealedBoxesData(False)
-
-                        # Show the fully unrevealed board for a second.
-                        drawBoard(mainBoard, revealedBoxes)
-                        pygame.display.update()
-                        pygame.time.wait(1000)
-
-                        # Replay the start game animation.
-                        startGameAnimation(mainBoard)
+                        wonTime = now + REVEAL_TIME  # flash once the last box is open
                     firstSelection = None  # reset firstSelection variable
 
-        # Redraw the screen and wait a clock tick.
-        pygame.display.update()
+        if wonTime != None and now >= wonTime + WON_TIME:
+            # Reset the board, show it unrevealed for a bit, then replay the start game animation.
+            mainBoard = getRandomizedBoard()
+            revealedBoxes = generateRevealedBoxesData(False)
+            boxTweens.clear()
+            startGameAnimation(mainBoard, boxTweens, now + NEW_BOARD_TIME)
+            wonTime = None
+            fullRedraw = True
+
+        # Move the highlight to the covered box the mouse is over, if it isn't sliding.
+        if boxx != None and boxy != None and not revealedBoxes[boxx][boxy] and (boxx, boxy) not in boxTweens:
+            newHighlightedBox = (boxx, boxy)
+        else:
+            newHighlightedBox = None
+        if newHighlightedBox != highlightedBox:
+            dirtyBoxes.update(box for box in (highlightedBox, newHighlightedBox) if box != None)
+            highlightedBox = newHighlightedBox
+
+        # Move every sliding box along, and flash the background if the player has won.
+        dirtyBoxes.update(updateBoxTweens(boxTweens, now))
+        if getWonBackgroundColor(wonTime, now) != bgColor:
+            bgColor = getWonBackgroundColor(wonTime, now)
+            fullRedraw = True
+
+        # Redraw the screen (or just the boxes that changed) and wait a clock tick.
+        if fullRedraw or not DIRTY_RECT_RENDERING:
+            DISPLAY_SURFACE.fill(bgColor)
+            drawBoard(mainBoard, revealedBoxes, boxTweens, now)
+            if highlightedBox != None:
+                drawHighlightBox(highlightedBox[0], highlightedBox[1])
+            pygame.display.update()
+            fullRedraw = False
+        elif dirtyBoxes:
+            pygame.display.update([drawBox(mainBoard, revealedBoxes, box[0], box[1], box == highlightedBox,
+                                           getBoxCoverage(boxTweens, box, now))
+                                   for box in dirtyBoxes])
         FPS_CLOCK.tick(FPS)
 
 
@@ -129,26 +208,90 @@ def generateRevealedBoxesData(val):
     return revealedBoxes
 
 
+def setBoardSize(width, height):
+    # Sets the number of columns and rows of boxes, and scrolls the view back to the top left.
+    global BOARD_WIDTH, BOARD_HEIGHT, VIEW_X, VIEW_Y
+    if width < 1 or height < 1:
+        raise ValueError('the board needs at least one column and one row')
+    if (width * height) % 2 != 0:
+        raise ValueError('the board needs an even number of boxes for pairs of matches')
+    BOARD_WIDTH = width
+    BOARD_HEIGHT = height
+    VIEW_X = 0
+    VIEW_Y = 0
+    setBoxSize(BOX_SIZE)
+
+
+def setBoxSize(boxSize):
+    # Sets the size of the boxes, with the gaps and margins that go with it.
+    global BOX_SIZE, GAP_SIZE, HIGHLIGHT_MARGIN, XMARGIN, YMARGIN
+    BOX_SIZE = boxSize
+    GAP_SIZE = boxSize // 4
+    HIGHLIGHT_MARGIN = GAP_SIZE // 2
+    # Center a board that fits in the window; one that doesn't gets a gap's margin and scrolls.
+    XMARGIN = max(int((WINDOW_WIDTH - (BOARD_WIDTH * (BOX_SIZE + GAP_SIZE))) / 2), GAP_SIZE)
+    YMARGIN = max(int((WINDOW_HEIGHT - (BOARD_HEIGHT * (BOX_SIZE + GAP_SIZE))) / 2), GAP_SIZE)
+    scrollView(0, 0)  # keep the view inside the board
+
+
+def scrollView(dx, dy):
+    # Scrolls the view by dx, dy pixels, stopping at the edges of the board.
+    # Returns True if the view moved.
+    global VIEW_X, VIEW_Y
+    maxViewX = max(2 * XMARGIN + BOARD_WIDTH * (BOX_SIZE + GAP_SIZE) - WINDOW_WIDTH, 0)
+    maxViewY = max(2 * YMARGIN + BOARD_HEIGHT * (BOX_SIZE + GAP_SIZE) - WINDOW_HEIGHT, 0)
+    viewx = min(max(VIEW_X + dx, 0), maxViewX)
+    viewy = min(max(VIEW_Y + dy, 0), maxViewY)
+    moved = (viewx, viewy) != (VIEW_X, VIEW_Y)
+    VIEW_X, VIEW_Y = viewx, viewy
+    return moved
+
+
+def zoomView(steps, focusx, focusy):
+    # Zooms in (or out, for negative steps) through ZOOM_BOX_SIZES, keeping the
+    # part of the board under the pixel focusx, focusy where it is.
+    # Returns True if the box size changed.
+    global VIEW_X, VIEW_Y
+    zoom = min(max(ZOOM_BOX_SIZES.index(BOX_SIZE) + steps, 0), len(ZOOM_BOX_SIZES) - 1)
+    if ZOOM_BOX_SIZES[zoom] == BOX_SIZE:
+        return False
+    # Where the focus is on the board, counted in boxes (and gaps) from its top left.
+    boardx = (focusx - XMARGIN + VIEW_X) / (BOX_SIZE + GAP_SIZE)
+    boardy = (focusy - YMARGIN + VIEW_Y) / (BOX_SIZE + GAP_SIZE)
+    setBoxSize(ZOOM_BOX_SIZES[zoom])
+    VIEW_X = int(boardx * (BOX_SIZE + GAP_SIZE)) + XMARGIN - focusx
+    VIEW_Y = int(boardy * (BOX_SIZE + GAP_SIZE)) + YMARGIN - focusy
+    scrollView(0, 0)  # keep the view inside the board
+    return True
+
+
+def getVisibleBoxes():
+    # Returns the ranges of columns and rows of the boxes that can be seen in the window.
+    step = BOX_SIZE + GAP_SIZE
+    columns = range(max((VIEW_X - XMARGIN) // step, 0), min((VIEW_X - XMARGIN + WINDOW_WIDTH) // step + 1, BOARD_WIDTH))
+    rows = range(max((VIEW_Y - YMARGIN) // step, 0), min((VIEW_Y - YMARGIN + WINDOW_HEIGHT) // step + 1, BOARD_HEIGHT))
+    return columns, rows
+
+
 def getRandomizedBoard():
-    # Get a list of every possible shape in every possible color.
+    # Get a list of every possible shape in every possible color. Boards
+    # too big for one set of them get more sets, each marked with a number.
+    numIconsUsed = BOARD_WIDTH * BOARD_HEIGHT // 2  # calculate how many icons are needed
+    numSets = -(-numIconsUsed // (len(ALL_COLORS) * len(ALL_SHAPES)))
     icons = []
-    for color in ALL_COLORS:
-        for shape in ALL_SHAPES:
-            icons.append((shape, color))
+    for mark in range(numSets):
+        for color in ALL_COLORS:
+            for shape in ALL_SHAPES:
+                icons.append((shape, color, mark))
 
     random.shuffle(icons)  # randomize the order of the icons list
-    numIconsUsed = int(BOARD_WIDTH * BOARD_HEIGHT / 2)  # calculate how many icons are needed
     icons = icons[:numIconsUsed] * 2  # make two of each icon
     random.shuffle(icons)
 
     # Create the board data structure, with randomly placed icons.
     board = []
     for x in range(BOARD_WIDTH):
-        column = []
-        for y in range(BOARD_HEIGHT):
-            column.append(icons[0])
-            del icons[0]  # remove the icons as we assign them
-        board.append(column)
+        board.append(icons[x * BOARD_HEIGHT:(x + 1) * BOARD_HEIGHT])
     return board
 
 
@@ -163,41 +306,89 @@ def splitIntoGroupsOf(groupSize, theList):
 
 def leftTopCoordsOfBox(boxx, boxy):
     #  Convert board coordinates to pixel coordinates.
-    left = boxx * (BOX_SIZE + GAP_SIZE) + XMARGIN
-    top = boxy * (BOX_SIZE + GAP_SIZE) + YMARGIN
+    left = boxx * (BOX_SIZE + GAP_SIZE) + XMARGIN - VIEW_X
+    top = boxy * (BOX_SIZE + GAP_SIZE) + YMARGIN - VIEW_Y
     return (left, top)
 
 
+def getBoxAreaRect(boxx, boxy):
+    # Returns the rect of a box and the highlight border around it, which
+    # is all the window a box ever draws on.
+    left, top = leftTopCoordsOfBox(boxx, boxy)
+    return pygame.Rect(left - HIGHLIGHT_MARGIN, top - HIGHLIGHT_MARGIN,
+                       BOX_SIZE + 2 * HIGHLIGHT_MARGIN, BOX_SIZE + 2 * HIGHLIGHT_MARGIN)
+
+
 def getBoxAtPixel(x,y):
-    for boxx in range(BOARD_WIDTH):
-        for boxy in range(BOARD_HEIGHT):
-            left, top = leftTopCoordsOfBox(boxx, boxy)
-            boxRect = pygame.Rect(left, top, BOX_SIZE, BOX_SIZE)
-            if boxRect.collidepoint(x, y):
-                return (boxx, boxy)
+    # Work out which box (or the gap after it) the pixel is in, then check it isn't the gap.
+    boxx, offsetx = divmod(x - XMARGIN + VIEW_X, BOX_SIZE + GAP_SIZE)
+    boxy, offsety = divmod(y - YMARGIN + VIEW_Y, BOX_SIZE + GAP_SIZE)
+    if 0 <= boxx < BOARD_WIDTH and 0 <= boxy < BOARD_HEIGHT and offsetx < BOX_SIZE and offsety < BOX_SIZE:
+        return (boxx, boxy)
     return (None, None)
 
 
-def drawIcon(shape, color, boxx, boxy):
-    quarter = int(BOX_SIZE * 0.25)  # syntactic sugar
-    half = int(BOX_SIZE * 0.5)  #  more syntactic sugar
-
-    left, top = leftTopCoordsOfBox(boxx, boxy)  # get pixel coords from board coords
-    # Draw all the shapes.
-    if shape == DONUT:
-        pygame.draw.circle(DISPLAY_SURFACE, color, (left + half, top + half), half -5)
-        pygame.draw.circle(DISPLAY_SURFACE, BG_COLOR, (left + half, top + half), quarter - 5)
-    elif shape == SQUARE:
-        pygame.draw.rect(DISPLAY_SURFACE, color, (left + quarter, top + quarter, BOX_SIZE - half, BOX_SIZE - half))
-    elif shape == DIAMOND:  # might go wrong...
-        pygame.draw.polygon(DISPLAY_SURFACE, color, (
-        (left + half, top), (left + BOX_SIZE - 1, top + half), (left + half, top + BOX_SIZE - 1), (left, top + half)))
-    elif shape == LINES:
-        for i in range(0, BOX_SIZE, 4):
-            pygame.draw.line(DISPLAY_SURFACE, color, (left, top + i), (left + 1, top))
-            pygame.draw.line(DISPLAY_SURFACE, color, (left + i, top + BOX_SIZE - 1), (left + BOX_SIZE - 1, top + i))
-    elif shape == OVAL:
-        pygame.draw.ellipse(DISPLAY_SURFACE, color, (left, top + quarter, BOX_SIZE, half))
+def getSprite(key):
+    # Returns the sprite for key, drawing it the first time it's needed.
+    # All the sprites are thrown away if the box size or colors change, or
+    # if scrolling around a huge board has filled the cache.
+    global SPRITE_CACHE_KEY
+    cacheKey = (BOX_SIZE, BG_COLOR, BOX_COLOR, HIGHLIGHT_COLOR)
+    if cacheKey != SPRITE_CACHE_KEY or len(SPRITE_CACHE) >= MAX_CACHED_SPRITES:
+        SPRITE_CACHE.clear()
+        SPRITE_CACHE_KEY = cacheKey
+    if key not in SPRITE_CACHE:
+        SPRITE_CACHE[key] = makeSprite(key)
+    return SPRITE_CACHE[key]
+
+
+def makeSprite(key):
+    # Draws a sprite: a box cover, a highlight border or a (shape, color, mark) icon.
+    if key == 'cover':
+        sprite = pygame.Surface((BOX_SIZE, BOX_SIZE))
+        sprite.fill(BOX_COLOR)
+        return sprite.convert()
+
+    if key == 'highlight':
+        size = BOX_SIZE + 2 * HIGHLIGHT_MARGIN
+        sprite = pygame.Surface((size, size))
+        sprite.fill(COLORKEY)
+        pygame.draw.rect(sprite, HIGHLIGHT_COLOR, (0, 0, size, size), 4)
+    else:
+        shape, color, mark = key
+        quarter = int(BOX_SIZE * 0.25)  # syntactic sugar
+        half = int(BOX_SIZE * 0.5)  #  more syntactic sugar
+        sprite = pygame.Surface((BOX_SIZE, BOX_SIZE))
+        sprite.fill(COLORKEY)
+        # Draw all the shapes.
+        if shape == DONUT:
+            pygame.draw.circle(sprite, color, (half, half), half -5)
+            pygame.draw.circle(sprite, BG_COLOR, (half, half), quarter - 5)
+        elif shape == SQUARE:
+            pygame.draw.rect(sprite, color, (quarter, quarter, BOX_SIZE - half, BOX_SIZE - half))
+        elif shape == DIAMOND:  # might go wrong...
+            pygame.draw.polygon(sprite, color, (
+            (half, 0), (BOX_SIZE - 1, half), (half, BOX_SIZE - 1), (0, half)))
+        elif shape == LINES:
+            for i in range(0, BOX_SIZE, 4):
+                pygame.draw.line(sprite, color, (0, i), (1, 0))
+                pygame.draw.line(sprite, color, (i, BOX_SIZE - 1), (BOX_SIZE - 1, i))
+        elif shape == OVAL:
+            pygame.draw.ellipse(sprite, color, (0, quarter, BOX_SIZE, half))
+        if mark > 0:
+            # Icons past the first set get their number in the bottom right corner.
+            text = getMarkFont().render(str(mark), True, WHITE, BLACK)
+            sprite.blit(text, (BOX_SIZE - text.get_width(), BOX_SIZE - text.get_height()))
+    sprite.set_colorkey(COLORKEY, RLEACCEL)
+    return sprite.convert()
+
+
+def getMarkFont():
+    # Returns the font for numbering icons, sized to suit the boxes.
+    size = max(BOX_SIZE // 2, 10)
+    if size not in MARK_FONTS:
+        MARK_FONTS[size] = pygame.font.Font(None, size)
+    return MARK_FONTS[size]
 
 
 def getShapeAndColor(board, boxx, boxy):
@@ -206,79 +397,125 @@ def getShapeAndColor(board, boxx, boxy):
     return board[boxx][boxy][0], board[boxx][boxy][1]
 
 
-def drawBoxCovers(board, boxes, coverage):
-    # Draws boxes being covered/revealed.
-    # 'Boxes' is a list of two-item lists, which have the x & y spot of the box.
-    for box in boxes:
-        left, top = leftTopCoordsOfBox(box[0], box[1])
-        pygame.draw.rect(DISPLAY_SURFACE, BG_COLOR, (left, top, BOX_SIZE, BOX_SIZE))
-        shape, color = getShapeAndColor(board, box[0], box[1])
-        drawIcon(shape, color, box[0], box[1])
-        if coverage > 0:  # only draw the cover if there is a coverage
-            pygame.draw.rect(DISPLAY_SURFACE, BOX_COLOR, (left, top, coverage, BOX_SIZE))
-            pygame.display.update()
-            FPS_CLOCK.tick(FPS)
+def getMark(board, boxx, boxy):
+    # The number of the set of icons the x, y spot's icon is from is stored in board[x][y][2]
+    return board[boxx][boxy][2]
 
 
-def revealBoxesAnimation(board, boxesToReveal):
-    # Do the 'box reveal' animation.
-    for coverage in range(BOX_SIZE, (-REVEAL_SPEED) - 1, - REVEAL_SPEED):
-        drawBoxCovers(board, boxesToReveal, coverage)
+def revealBoxesAnimation(tweens, boxesToReveal, startTime):
+    # Queue the 'box reveal' animation.
+    for box in boxesToReveal:
+        addBoxTween(tweens, box, startTime, 1, 0)
 
 
-def coverBoxesAnimation(board, boxesToCover):
-    # Do the 'box cover' animation.
-    for coverage in range(0, BOX_SIZE + REVEAL_SPEED, REVEAL_SPEED):
-        drawBoxCovers(board, boxesToCover, coverage)
+def coverBoxesAnimation(tweens, boxesToCover, startTime):
+    # Queue the 'box cover' animation.
+    for box in boxesToCover:
+        addBoxTween(tweens, box, startTime, 0, 1)
 
 
-def drawBoard(board, revealed):
-    # Draws all the boxes in their covered or revealed states.
-    for boxx in range(BOARD_WIDTH):
-        for boxy in range(BOARD_HEIGHT):
-            left, top = leftTopCoordsOfBox(boxx, boxy)
-            if not revealed[boxx][boxy]:
-                # Draw a covered box.
-                pygame.draw.rect(DISPLAY_SURFACE, BOX_COLOR, (left, top, BOX_SIZE, BOX_SIZE))
-            else:
-                # Draw the (revealed) icon.
-                shape, color = getShapeAndColor(board, boxx, boxy)
-                drawIcon(shape, color, boxx, boxy)
+def addBoxTween(tweens, box, startTime, fromCoverage, toCoverage):
+    # Queues a slide of a box's cover from fromCoverage to toCoverage (how
+    # much of the box is covered, from 0 to 1) that takes REVEAL_TIME
+    # milliseconds from startTime. A box's tweens play one after the other.
+    tweens.setdefault(box, []).append((startTime, fromCoverage, toCoverage))
 
 
-def drawHighlightBox(boxx, boxy):
+def getBoxCoverage(tweens, box, now):
+    # Returns how much of a box is covered at time now, or None if it isn't
+    # sliding and should be drawn the way the board says it is.
+    if box not in tweens:
+        return None
+    segments = tweens[box]
+    while len(segments) > 1 and now >= segments[1][0]:
+        del segments[0]  # drop the tweens that are over
+    startTime, fromCoverage, toCoverage = segments[0]
+    progress = min(max((now - startTime) / REVEAL_TIME, 0), 1)
+    return fromCoverage + (toCoverage - fromCoverage) * progress
+
+
+def updateBoxTweens(tweens, now):
+    # Forgets the tweens that are over by time now, and returns the boxes
+    # that need drawing again: the ones sliding and the ones whose tween
+    # just ended. Boxes waiting for their first or next tween aren't included.
+    movedBoxes = []
+    for box, segments in list(tweens.items()):
+        if now < segments[0][0]:
+            continue  # this box is waiting to slide
+        movedBoxes.append(box)
+        while segments and now >= segments[0][0] + REVEAL_TIME:
+            del segments[0]  # drop the tweens that are over
+        if segments == []:
+            del tweens[box]
+    return movedBoxes
+
+
+def getBoxBlits(board, revealed, boxx, boxy, coverage=None):
+    # Returns the blits that draw a box: its cover, its icon, or while it's
+    # sliding, its icon with coverage of the cover pulled over it.
     left, top = leftTopCoordsOfBox(boxx, boxy)
-    pygame.draw.rect(DISPLAY_SURFACE, HIGHLIGHT_COLOR, (left - 5, top - 5, BOX_SIZE + 10, BOX_SIZE + 10), 4)
+    if coverage == None:
+        coverage = 0 if revealed[boxx][boxy] else 1
+    coverWidth = int(coverage * BOX_SIZE)
+    if coverWidth >= BOX_SIZE:
+        return [(getSprite('cover'), (left, top))]
+    blits = [(getSprite(board[boxx][boxy]), (left, top))]
+    if coverWidth > 0:  # only draw the cover if there is a coverage
+        blits.append((getSprite('cover'), (left, top), (0, 0, coverWidth, BOX_SIZE)))
+    return blits
+
+
+def drawBoard(board, revealed, tweens=None, now=0):
+    # Draws all the boxes that can be seen in their covered, revealed or
+    # sliding states, in one batch of blits.
+    blits = []
+    columns, rows = getVisibleBoxes()
+    for boxx in columns:
+        for boxy in rows:
+            coverage = getBoxCoverage(tweens, (boxx, boxy), now) if tweens else None
+            blits.extend(getBoxBlits(board, revealed, boxx, boxy, coverage))
+    DISPLAY_SURFACE.blits(blits, False)
+
+
+def drawBox(board, revealed, boxx, boxy, highlighted=False, coverage=None):
+    # Draws one box over whatever was there, with its highlight if it has
+    # one, and returns the rect of the window that changed.
+    areaRect = getBoxAreaRect(boxx, boxy)
+    DISPLAY_SURFACE.fill(BG_COLOR, areaRect)
+    DISPLAY_SURFACE.blits(getBoxBlits(board, revealed, boxx, boxy, coverage), False)
+    if highlighted:
+        drawHighlightBox(boxx, boxy)
+    return areaRect
 
 
-def startGameAnimation(board):
-    # Randomly reveal the boxes 8 at a time.
-    coveredBoxes = generateRevealedBoxesData(False)
+def drawHighlightBox(boxx, boxy):
+    DISPLAY_SURFACE.blit(getSprite('highlight'), getBoxAreaRect(boxx, boxy))
+
+
+def startGameAnimation(board, tweens, startTime):
+    # Queue revealing the boxes that can be seen 8 at a time, in a random order.
     boxes = []
-    for x in range(BOARD_WIDTH):
-        for y in range(BOARD_HEIGHT):
+    columns, rows = getVisibleBoxes()
+    for x in columns:
+        for y in rows:
             boxes.append((x, y))
     random.shuffle(boxes)
     boxGroups = splitIntoGroupsOf(8, boxes)
 
-    drawBoard(board, coveredBoxes)
-    for boxGroup in boxGroups:
-        revealBoxesAnimation(board, boxGroup)
-        coverBoxesAnimation(board, boxGroup)
-
+    for i, boxGroup in enumerate(boxGroups):
+        revealBoxesAnimation(tweens, boxGroup, startTime + 2 * i * REVEAL_TIME)
+        coverBoxesAnimation(tweens, boxGroup, startTime + (2 * i + 1) * REVEAL_TIME)
 
-def gameWonAnimation(board):
-    # Flash the background color when the player has won.
-    coveredBoxes = generateRevealedBoxesData(True)
-    color1 = LIGHT_BG_COLOR
-    color2 = BG_COLOR
 
-    for i in range(13):
-        color1, color2 = color2, color1  # swaps the colors
-        DISPLAY_SURFACE.fill(color1)
-        drawBoard(board, coveredBoxes)
-        pygame.display.update()
-        pygame.time.wait(300)
+def getWonBackgroundColor(wonTime, now):
+    # Returns the background color at time now, which flashes after
+    # wonTime when the player has won.
+    if wonTime == None or now < wonTime:
+        return BG_COLOR
+    flash = (now - wonTime) // WON_FLASH_TIME
+    if flash < WON_FLASHES and flash % 2 == 1:
+        return LIGHT_BG_COLOR
+    return BG_COLOR
 
 
 def hasWon(revealedBoxes):
@@ -1,15 +1,62 @@
+import argparse
+import itertools
+import math
+import multiprocessing
 import random
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Only needed for the solver.
 
 NUM_DIGITS = 3
 MAX_GUESS = 10
+ALL_SYMBOLS = '0123456789abcdefghijklmnopqrstuvwxyz'  # The digits of numbers up to base 36.
+SYMBOLS = ALL_SYMBOLS[:10]  # The digits secret numbers are made of.
+SOLVER_STRATEGIES = ['minimax', 'expected']
+SIMULATION_STRATEGIES = ['random', 'greedy', 'optimal']
+SIMULATION_BATCH_SIZE = 2000  # Games each worker plays before reporting back.
+MAX_MATRIX_SECRETS = 6000  # Above this many secret numbers, the solver doesn't build a clue matrix.
+SECRET_SAMPLE_SIZE = 300  # Possible answers sampled to estimate how well a guess splits them.
+GUESS_SAMPLE_SIZE = 40  # Possible answers tried as the next guess.
+SAMPLE_SEARCH_SIZE = 10  # Possible answers taken from each random search when sampling.
+
+# A clue is coded as a number: Fermis * (NUM_DIGITS + 1) + Picos.
+NUM_CLUE_CODES = (NUM_DIGITS + 1) ** 2
+WIN_CLUE_CODE = NUM_DIGITS * (NUM_DIGITS + 1)
+
+# The solver's tables, built the first time they are needed.
+ALL_SECRET_NUMS = None
+SECRET_NUM_INDEXES = None
+CLUE_MATRIX = None
+
+# Guesses taken against each secret number by strategies that always play the same way.
+SIMULATION_RESULTS = {}
 
-def getSecretNum():
-    # Returns a string of unique random digits that is NUM_DIGITS long.
-    numbers = list(range(10))
-    random.shuffle(numbers)
+def setGameSize(num_digits, symbols):
+    # Sets the number of digits in secret numbers and the symbols they use, and clears the solver's tables.
+    global NUM_DIGITS, SYMBOLS, NUM_CLUE_CODES, WIN_CLUE_CODE, ALL_SECRET_NUMS, SECRET_NUM_INDEXES, CLUE_MATRIX
+    if len(set(symbols)) != len(symbols):
+        raise ValueError('the symbols must all be different')
+    if not 1 <= num_digits <= len(symbols):
+        raise ValueError(f'secret numbers must have 1 to {len(symbols)} digits')
+    NUM_DIGITS = num_digits
+    SYMBOLS = symbols
+    NUM_CLUE_CODES = (NUM_DIGITS + 1) ** 2
+    WIN_CLUE_CODE = NUM_DIGITS * (NUM_DIGITS + 1)
+    ALL_SECRET_NUMS = None
+    SECRET_NUM_INDEXES = None
+    CLUE_MATRIX = None
+    SIMULATION_RESULTS.clear()
+
+def getSecretNum(rng=random):
+    # Returns a string of unique random digits from SYMBOLS that is NUM_DIGITS long.
+    numbers = list(SYMBOLS)
+    rng.shuffle(numbers)
     secretNum = ''
     for i in range(NUM_DIGITS):
-        secretNum += str(numbers[i])
+        secretNum += numbers[i]
     return secretNum
 
 def getClues(guess, secretNum):
@@ -30,40 +77,479 @@ def getClues(guess, secretNum):
     return ' '.join(clues)
 
 def isOnlyDigits(num):
-    # Returns true if num is a string of only digits.
+    # Returns true if num is a string of only digits from SYMBOLS.
     if num == '':
         return False
     for i in num:
-        if i not in '0 1 2 3 4 5 6 7 7 8 9'.split():
+        if i not in SYMBOLS:
             return False
     return True
 
-print(f'I am thinking of a {NUM_DIGITS}-digit number. Try to guess what it is!')
-print('The clues I give are...')
-print('When I say:    That means:')
-print('Bagels          None of the digits is correct.')
-print('Pico            One digit is correct but in the wrong position.')
-print('Fermi           One digit is correct and in the right position.')
+def getSecretCount():
+    # Returns how many different secret numbers there are.
+    return math.perm(len(SYMBOLS), NUM_DIGITS)
+
+def getClueCode(guess, secretNum):
+    # Returns the clues getClues would give, coded as one number.
+    fermis = 0
+    picos = 0
+    for i in range(len(guess)):
+        if guess[i] == secretNum[i]:
+            fermis += 1
+        elif guess[i] in secretNum:
+            picos += 1
+    return fermis * (NUM_DIGITS + 1) + picos
+
+def checkNumpy():
+    # Raise ImportError if numpy, which the solver needs, isn't installed.
+    if np is None:
+        raise ImportError('the solver needs numpy (pip install numpy)')
 
-while True:
-    secretNum = getSecretNum()
-    print(f'I have thought up a number. You have {MAX_GUESS} guesses to get it right.')
+def getClueMatrix():
+    '''Returns (secret numbers, clue matrix): a list of every possible secret
+    number, and an array whose [i, j] entry is the clue code for guessing
+    secret number i when the answer is secret number j.'''
+    global ALL_SECRET_NUMS, SECRET_NUM_INDEXES, CLUE_MATRIX
+    if CLUE_MATRIX is None:
+        checkNumpy()
+        if getSecretCount() > MAX_MATRIX_SECRETS:
+            raise ValueError(f'there are too many secret numbers ({getSecretCount()}) for a clue matrix')
+        ALL_SECRET_NUMS = [''.join(digits) for digits in itertools.permutations(SYMBOLS, NUM_DIGITS)]
+        SECRET_NUM_INDEXES = {secretNum: i for i, secretNum in enumerate(ALL_SECRET_NUMS)}
+        digits = np.array([[SYMBOLS.index(digit) for digit in secretNum] for secretNum in ALL_SECRET_NUMS])
+        # Secret numbers have no repeated digits, so the digits two numbers
+        # share is a dot product of which digits each one has.
+        has_digit = np.zeros((len(ALL_SECRET_NUMS), len(SYMBOLS)), dtype=np.int32)
+        np.put_along_axis(has_digit, digits, 1, axis=1)
+        shared = has_digit @ has_digit.T
+        fermis = np.zeros_like(shared)
+        for i in range(NUM_DIGITS):
+            fermis += digits[:, i, np.newaxis] == digits[np.newaxis, :, i]
+        CLUE_MATRIX = (fermis * (NUM_DIGITS + 1) + shared - fermis).astype(np.int16)
+    return ALL_SECRET_NUMS, CLUE_MATRIX
 
-    guessesTaken = 1
-    while guessesTaken <= MAX_GUESS:
-        guess = ''
-        while len(guess) != NUM_DIGITS or not isOnlyDigits(guess):
-            print(f'Guess #{guessesTaken}: ')
-            guess = input()
+def getPartitionSizes(guesses, candidates):
+    # Returns an array of how many of the candidates (secret number indexes) give each clue code for each guess.
+    clue_matrix = getClueMatrix()[1]
+    codes = clue_matrix[np.ix_(guesses, candidates)].astype(np.intp)
+    codes += np.arange(len(guesses))[:, np.newaxis] * NUM_CLUE_CODES
+    return np.bincount(codes.ravel(), minlength=len(guesses) * NUM_CLUE_CODES).reshape(len(guesses), NUM_CLUE_CODES)
 
-        print(getClues(guess, secretNum))
-        guessesTaken += 1
+def chooseGuess(candidates, strategy='minimax'):
+    '''Returns the index of the best secret number to guess next when the
+    answer is one of the candidates (an array of secret number indexes).
+    The minimax strategy keeps the most candidates that can be left after
+    the clue as small as possible, and the expected strategy keeps the
+    average number left as small as possible. Ties go to guesses that might
+    be the answer.'''
+    if len(candidates) <= 2:
+        return int(candidates[0])
+    guesses = np.arange(len(getClueMatrix()[0]))
+    sizes = getPartitionSizes(guesses, candidates)
+    if strategy == 'minimax':
+        scores = sizes.max(axis=1)
+    else:
+        scores = (sizes * sizes).sum(axis=1)
+    is_candidate = np.zeros(len(guesses), dtype=bool)
+    is_candidate[candidates] = True
+    return int(np.argmin(scores * 2 + ~is_candidate))
+
+def pruneCandidates(candidates, guess, clue_code):
+    # Returns the candidates (secret number indexes) that would give clue_code for the guess index.
+    return candidates[getClueMatrix()[1][guess, candidates] == clue_code]
+
+def solveAll(strategy='minimax'):
+    '''Plays the solver against every possible secret number at once, sharing
+    the work for secrets that get the same clues. Returns a dictionary of
+    how many secret numbers took each number of guesses.'''
+    secretNums = getClueMatrix()[0]
+    guess_counts = {}
+    games = [(np.arange(len(secretNums)), 1)]
+    while games:
+        candidates, guessesTaken = games.pop()
+        guess = chooseGuess(candidates, strategy)
+        codes = getClueMatrix()[1][guess, candidates]
+        for code in np.unique(codes).tolist():
+            if code == WIN_CLUE_CODE:
+                guess_counts[guessesTaken] = guess_counts.get(guessesTaken, 0) + 1
+            else:
+                games.append((candidates[codes == code], guessesTaken + 1))
+    return guess_counts
+
+class MatrixSolver:
+    '''Plays one game using the clue matrix. The random strategy guesses any
+    secret number that fits the clues so far, greedy guesses the one of
+    those that leaves the fewest on average, and minimax and expected
+    choose from every number as chooseGuess does.'''
+
+    def __init__(self, strategy='minimax', rng=random):
+        self.strategy = strategy
+        self.rng = rng
+        self.candidates = np.arange(len(getClueMatrix()[0]))
+
+    def chooseGuess(self):
+        # Returns the next guess.
+        if self.strategy == 'random':
+            guess = int(self.candidates[self.rng.randrange(len(self.candidates))])
+        elif self.strategy == 'greedy' and len(self.candidates) > 2:
+            sizes = getPartitionSizes(self.candidates, self.candidates)
+            guess = int(self.candidates[np.argmin((sizes * sizes).sum(axis=1))])
+        else:
+            guess = chooseGuess(self.candidates, 'expected' if self.strategy == 'greedy' else self.strategy)
+        return ALL_SECRET_NUMS[guess]
+
+    def addClue(self, guess, clue_code):
+        # Records the clue code given for guess.
+        self.candidates = pruneCandidates(self.candidates, SECRET_NUM_INDEXES[guess], clue_code)
+
+class ConstraintSolver:
+    '''Finds secret numbers that fit the clues so far without ever listing
+    every secret number, so it works however many digits and symbols there
+    are. It first picks which symbols are in the number, then where they go,
+    keeping sets of symbols as bit masks so each clue can rule out or force
+    many symbols at once.'''
+
+    def __init__(self, rng=random):
+        self.rng = rng
+        self.clues = []  # (digit indexes of the guess, symbol mask of the guess, Fermis, Fermis + Picos)
+
+    def addClue(self, guess, clue_code):
+        # Records the clue code given for guess.
+        digits = [SYMBOLS.index(digit) for digit in guess]
+        mask = 0
+        for digit in digits:
+            mask |= 1 << digit
+        fermis, picos = divmod(clue_code, NUM_DIGITS + 1)
+        self.clues.append((digits, mask, fermis, fermis + picos))
+
+    def getSymbolSets(self, chosen=0, undecided=None):
+        '''Yields every mask of NUM_DIGITS symbols that shares the right number
+        of symbols with each guess. chosen and undecided are the masks of
+        symbols already put in and not yet decided on.'''
+        if undecided is None:
+            undecided = (1 << len(SYMBOLS)) - 1
+        # Put in or leave out every symbol that a clue, or the number of digits, forces.
+        limits = [(mask, shared_target) for digits, mask, fermi_target, shared_target in self.clues]
+        limits.append(((1 << len(SYMBOLS)) - 1, NUM_DIGITS))
+        changed = True
+        while changed:
+            changed = False
+            for mask, target in limits:
+                have = bin(chosen & mask).count('1')
+                could_add = bin(undecided & mask).count('1')
+                if have > target or have + could_add < target:
+                    return
+                if could_add > 0 and have == target:
+                    undecided &= ~mask
+                    changed = True
+                elif could_add > 0 and have + could_add == target:
+                    chosen |= undecided & mask
+                    undecided &= ~mask
+                    changed = True
+        if undecided == 0:
+            yield chosen
+            return
+
+        undecided_symbols = [digit for digit in range(len(SYMBOLS)) if undecided >> digit & 1]
+        symbol = 1 << self.rng.choice(undecided_symbols)
+        if self.rng.random() < NUM_DIGITS / len(SYMBOLS):
+            yield from self.getSymbolSets(chosen | symbol, undecided & ~symbol)
+            yield from self.getSymbolSets(chosen, undecided & ~symbol)
+        else:
+            yield from self.getSymbolSets(chosen, undecided & ~symbol)
+            yield from self.getSymbolSets(chosen | symbol, undecided & ~symbol)
+
+    def getArrangements(self, symbols):
+        '''Yields every secret number made of the symbols in the mask symbols
+        that has the right number of Fermis for each guess.'''
+        ruled_out = [0] * NUM_DIGITS  # Symbols a guess with no Fermis had in each place.
+        for digits, mask, fermi_target, shared_target in self.clues:
+            if fermi_target == 0:
+                for position, digit in enumerate(digits):
+                    ruled_out[position] |= 1 << digit
+        fermis = [0] * len(self.clues)
+        secret = []
+
+        def extend(unused):
+            position = len(secret)
+            if position == NUM_DIGITS:
+                yield ''.join(SYMBOLS[digit] for digit in secret)
+                return
+            allowed = unused & ~ruled_out[position]
+            for i, (digits, mask, fermi_target, shared_target) in enumerate(self.clues):
+                fermis_needed = fermi_target - fermis[i]
+                if fermis_needed == 0:
+                    allowed &= ~(1 << digits[position])
+                    continue
+                # Places where this guess's digit could still be matched.
+                could_match = sum(1 for digit in digits[position:] if unused >> digit & 1)
+                if fermis_needed > could_match:
+                    return
+                if fermis_needed == could_match and unused >> digits[position] & 1:
+                    allowed &= 1 << digits[position]
+            choices = [digit for digit in range(len(SYMBOLS)) if allowed >> digit & 1]
+            self.rng.shuffle(choices)
+            for digit in choices:
+                for i, (digits, mask, fermi_target, shared_target) in enumerate(self.clues):
+                    fermis[i] += digits[position] == digit
+                secret.append(digit)
+                yield from extend(unused & ~(1 << digit))
+                secret.pop()
+                for i, (digits, mask, fermi_target, shared_target) in enumerate(self.clues):
+                    fermis[i] -= digits[position] == digit
+
+        return extend(symbols)
+
+    def getCandidates(self):
+        '''Yields every secret number that fits all the clues, in a random
+        order. Numbers with the same symbols tend to come out together.'''
+        for symbols in self.getSymbolSets():
+            yield from self.getArrangements(symbols)
 
+    def getCandidateSample(self):
+        '''Returns a list of up to SECRET_SAMPLE_SIZE secret numbers that fit
+        the clues, taken a few at a time from separate random searches so
+        they are spread out. If there are only a few, returns all of them.'''
+        sample = set()
+        for search in range(SECRET_SAMPLE_SIZE // SAMPLE_SEARCH_SIZE):
+            found = list(itertools.islice(self.getCandidates(), SAMPLE_SEARCH_SIZE + 1))
+            if len(found) <= SAMPLE_SEARCH_SIZE:
+                return found  # The search found every one there is.
+            sample.update(found[:SAMPLE_SEARCH_SIZE])
+        return list(sample)
+
+    def chooseGuess(self):
+        '''Returns the next guess: of a sample of the secret numbers that fit
+        the clues, the one whose clues would tell the most (have the highest
+        entropy) about the whole sample.'''
+        candidates = self.getCandidateSample()
+        if len(candidates) == 0:
+            raise ValueError('no secret number fits all the clues')
+        if len(candidates) <= 2 or len(self.clues) == 0:
+            return candidates[0]  # Before any clues, every guess is as good as any other.
+        best_guess = candidates[0]
+        best_entropy = -1
+        for guess in candidates[:GUESS_SAMPLE_SIZE]:
+            partition_sizes = {}
+            for secretNum in candidates:
+                code = getClueCode(guess, secretNum)
+                partition_sizes[code] = partition_sizes.get(code, 0) + 1
+            entropy = -sum(size / len(candidates) * math.log2(size / len(candidates))
+                           for size in partition_sizes.values())
+            if entropy > best_entropy:
+                best_guess = guess
+                best_entropy = entropy
+        return best_guess
+
+class RandomConstraintSolver(ConstraintSolver):
+    # A ConstraintSolver that guesses any secret number that fits the clues so far.
+
+    def chooseGuess(self):
+        for guess in self.getCandidates():
+            return guess
+        raise ValueError('no secret number fits all the clues')
+
+def getSolver(strategy, rng=random):
+    '''Returns a new solver for one game, with chooseGuess() and
+    addClue(guess, clue_code) methods. strategy is one of SOLVER_STRATEGIES
+    or SIMULATION_STRATEGIES, where optimal means minimax. Without a clue
+    matrix, every strategy but random falls back to ConstraintSolver.'''
+    if getSecretCount() <= MAX_MATRIX_SECRETS:
+        return MatrixSolver('minimax' if strategy == 'optimal' else strategy, rng)
+    if strategy == 'random':
+        return RandomConstraintSolver(rng)
+    return ConstraintSolver(rng)
+
+def playGame(secretNum, guess_function, clue_function=None, max_guess=None):
+    '''Plays one game against secretNum. guess_function(guessesTaken)
+    returns each guess, and clue_function(guess, clues) is given the clues
+    for it. Returns the number of guesses taken, or None if the number
+    wasn't found within max_guess guesses (if there is a limit).'''
+    guessesTaken = 1
+    while max_guess is None or guessesTaken <= max_guess:
+        guess = guess_function(guessesTaken)
+        if clue_function is not None:
+            clue_function(guess, getClues(guess, secretNum))
         if guess == secretNum:
-            break
-        if guessesTaken == MAX_GUESS:
+            return guessesTaken
+        guessesTaken += 1
+    return None
+
+def playSolverGame(secretNum, strategy='minimax', rng=random, show=False):
+    '''Lets a solver find secretNum, printing each guess and its clues if
+    show is true, and returns the number of guesses it took.'''
+    solver = getSolver(strategy, rng)
+    guessesTaken = 0
+
+    def guessFunction(guess_number):
+        nonlocal guessesTaken
+        guessesTaken = guess_number
+        return solver.chooseGuess()
+
+    def clueFunction(guess, clues):
+        if show:
+            print(f'Guess #{guessesTaken}: {guess}  {clues}')
+        solver.addClue(guess, getClueCode(guess, secretNum))
+
+    return playGame(secretNum, guessFunction, clueFunction)
+
+def simulateGames(batch):
+    '''Plays a batch of games with random secret numbers, given as a
+    (strategy, games, seed) tuple. Returns a dictionary of how many games
+    took each number of guesses.'''
+    strategy, games, seed = batch
+    rng = random.Random(seed)
+    # The solvers for these strategies always play the same game against the same number.
+    repeatable = strategy != 'random' and getSecretCount() <= MAX_MATRIX_SECRETS
+    guess_counts = {}
+    for game in range(games):
+        secretNum = getSecretNum(rng)
+        if repeatable and (strategy, secretNum) in SIMULATION_RESULTS:
+            guessesTaken = SIMULATION_RESULTS[strategy, secretNum]
+        else:
+            guessesTaken = playSolverGame(secretNum, strategy, rng)
+            if repeatable:
+                SIMULATION_RESULTS[strategy, secretNum] = guessesTaken
+        guess_counts[guessesTaken] = guess_counts.get(guessesTaken, 0) + 1
+    return guess_counts
+
+def printGuessCounts(guess_counts):
+    # Prints the average and worst number of guesses, and the share of games won with each limit on guesses.
+    games = sum(guess_counts.values())
+    average = sum(guesses * count for guesses, count in guess_counts.items()) / games
+    print(f'Worst case: {max(guess_counts)} guesses. Average: {average:.3f} guesses.')
+    won = 0
+    for guesses in range(1, max(guess_counts) + 1):
+        won += guess_counts.get(guesses, 0)
+        marker = '  <- MAX_GUESS' if guesses == MAX_GUESS else ''
+        print(f'{guesses:3} guesses: {guess_counts.get(guesses, 0):9}  won with this many: {won / games:7.2%}{marker}')
+
+def runSimulation(strategy, games, workers=None, seed=0, batch_size=SIMULATION_BATCH_SIZE):
+    '''Plays games with random secret numbers across a pool of worker
+    processes (one per core by default), adding up how many guesses each
+    took as batches finish and printing progress about once a second.
+    Batch i uses the random seed seed + i. Games are played until the number
+    is found, so the results show the win rate for any MAX_GUESS.
+    Returns the dictionary of how many games took each number of guesses.'''
+    getSolver(strategy)  # Check the strategy can be played before starting the pool.
+    batches = [(strategy, min(batch_size, games - start), seed + i)
+               for i, start in enumerate(range(0, games, batch_size))]
+    guess_counts = {}
+    games_played = 0
+    start_time = time.perf_counter()
+    last_report = start_time
+
+    with multiprocessing.Pool(workers, setGameSize, (NUM_DIGITS, SYMBOLS)) as pool:
+        for batch_counts in pool.imap_unordered(simulateGames, batches):
+            for guesses, count in batch_counts.items():
+                guess_counts[guesses] = guess_counts.get(guesses, 0) + count
+                games_played += count
+            now = time.perf_counter()
+            if now - last_report >= 1:
+                last_report = now
+                won = sum(count for guesses, count in guess_counts.items() if guesses <= MAX_GUESS)
+                print(f'{games_played}/{games} games, {won / games_played:.2%} won '
+                      f'({games_played / (now - start_time):.0f} games/s)')
+
+    elapsed = time.perf_counter() - start_time
+    print(f'Played {games_played} games with the {strategy} strategy in {elapsed:.1f}s '
+          f'({games_played / elapsed:.0f} games/s).')
+    printGuessCounts(guess_counts)
+    return guess_counts
+
+def printSolverReport(strategy='minimax'):
+    # Prints the worst and average number of guesses the solver takes, and how often it takes each.
+    start_time = time.perf_counter()
+    guess_counts = solveAll(strategy)
+    elapsed = time.perf_counter() - start_time
+    games = sum(guess_counts.values())
+    average = sum(guesses * count for guesses, count in guess_counts.items()) / games
+    print(f'Solved all {games} secret numbers with the {strategy} strategy in {elapsed:.2f}s.')
+    print(f'Worst case: {max(guess_counts)} guesses. Average: {average:.3f} guesses.')
+    for guesses in sorted(guess_counts):
+        print(f'{guesses:3} guesses: {guess_counts[guesses]}')
+
+def getPlayerGuess(guessesTaken):
+    # Asks the player for a guess until they type a NUM_DIGITS-digit number.
+    guess = ''
+    while len(guess) != NUM_DIGITS or not isOnlyDigits(guess):
+        print(f'Guess #{guessesTaken}: ')
+        guess = input().lower()
+    return guess
+
+def showClues(guess, clues):
+    print(clues)
+
+def playInteractive():
+    print(f'I am thinking of a {NUM_DIGITS}-digit number. Try to guess what it is!')
+    if SYMBOLS != ALL_SYMBOLS[:10]:
+        print(f'Its digits are all different and come from {SYMBOLS}.')
+    print('The clues I give are...')
+    print('When I say:    That means:')
+    print('Bagels          None of the digits is correct.')
+    print('Pico            One digit is correct but in the wrong position.')
+    print('Fermi           One digit is correct and in the right position.')
+
+    while True:
+        secretNum = getSecretNum()
+        print(f'I have thought up a number. You have {MAX_GUESS} guesses to get it right.')
+
+        if playGame(secretNum, getPlayerGuess, showClues, MAX_GUESS) is None:
             print(f'Sorry, you ran out of guesses. The answer was {secretNum}.')
 
-    print('Do you want to play again? (yes or no)')
-    if not input().lower().startswith('y'):
-        break
\ No newline at end of file
+        print('Do you want to play again? (yes or no)')
+        if not input().lower().startswith('y'):
+            break
+
+def main():
+    global MAX_GUESS
+    parser = argparse.ArgumentParser(description='Bagels, a deductive logic game. With no command, play a game.')
+    parser.add_argument('--digits', type=int, default=NUM_DIGITS,
+                        help=f'digits in the secret number (default {NUM_DIGITS})')
+    parser.add_argument('--base', type=int, default=len(SYMBOLS),
+                        help=f'how many symbols digits can be, up to {len(ALL_SYMBOLS)} (default {len(SYMBOLS)})')
+    parser.add_argument('--max-guess', type=int, default=MAX_GUESS,
+                        help=f'guesses allowed in each game (default {MAX_GUESS})')
+    subparsers = parser.add_subparsers(dest='command')
+    solve_parser = subparsers.add_parser('solve', help='measure how many guesses the solver needs')
+    solve_parser.add_argument('--strategy', choices=SOLVER_STRATEGIES, default='minimax',
+                              help='how the solver picks guesses (default minimax)')
+    solve_parser.add_argument('--secret', help='show the solver finding this secret number')
+    simulate_parser = subparsers.add_parser('simulate', help='play many games with random numbers and count guesses')
+    simulate_parser.add_argument('--strategy', choices=SIMULATION_STRATEGIES, default='greedy',
+                                 help='how guesses are picked (default greedy)')
+    simulate_parser.add_argument('--games', type=int, default=100000, help='games to play (default 100000)')
+    simulate_parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    simulate_parser.add_argument('--seed', type=int, default=0, help='first random seed (default 0)')
+    args = parser.parse_args()
+    if not 2 <= args.base <= len(ALL_SYMBOLS):
+        parser.error(f'the base must be from 2 to {len(ALL_SYMBOLS)}')
+    if args.max_guess < 1:
+        parser.error('there must be at least one guess')
+    try:
+        setGameSize(args.digits, ALL_SYMBOLS[:args.base])
+    except ValueError as error:
+        parser.error(str(error))
+    MAX_GUESS = args.max_guess
+
+    if args.command is None:
+        playInteractive()
+        return
+    try:
+        if args.command == 'simulate':
+            runSimulation(args.strategy, args.games, args.workers, args.seed)
+        elif args.secret is not None:
+            secretNum = args.secret.lower()
+            if len(secretNum) != NUM_DIGITS or not isOnlyDigits(secretNum) or len(set(secretNum)) != NUM_DIGITS:
+                parser.error(f'the secret number must be {NUM_DIGITS} different digits from {SYMBOLS}')
+            playSolverGame(secretNum, args.strategy, show=True)
+        elif getSecretCount() > MAX_MATRIX_SECRETS:
+            parser.error(f'there are too many secret numbers ({getSecretCount()}) to solve them all; '
+                         'try --secret instead')
+        else:
+            printSolverReport(args.strategy)
+    except (ImportError, ValueError) as error:
+        parser.exit(1, f'{error}\n')
+
+if __name__ == '__main__':
+    main()
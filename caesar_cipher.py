@@ -1,5 +1,33 @@
+import argparse
+import mmap
+import multiprocessing
+import os
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Only needed for cracking keys.
+
 SYMBOLS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZqwertyuiopasdfghjklzxcvbnme'
 MAX_KEY_SIZE = len(SYMBOLS)
+CHUNK_SIZE = 16 * 1024 * 1024  # Bytes translated at a time when streaming a file.
+BATCH_CHUNK_SIZE = 4 * 1024 * 1024  # Bytes in each piece of work when translating a directory.
+
+CRACK_PREVIEW_LENGTH = 60  # Characters of each cracked message shown.
+UPPERCASE_FRACTION = 0.05  # About how many letters in English text are capitals.
+
+# How often each letter appears in English text, in percent.
+ENGLISH_LETTER_FREQUENCIES = {
+    'a': 8.17, 'b': 1.49, 'c': 2.78, 'd': 4.25, 'e': 12.70, 'f': 2.23, 'g': 2.02,
+    'h': 6.09, 'i': 6.97, 'j': 0.15, 'k': 0.77, 'l': 4.03, 'm': 2.41, 'n': 6.75,
+    'o': 7.51, 'p': 1.93, 'q': 0.10, 'r': 5.99, 's': 6.33, 't': 9.06, 'u': 2.76,
+    'v': 0.98, 'w': 2.36, 'x': 0.15, 'y': 1.97, 'z': 0.07,
+}
+
+# Translation tables already built, keyed by (mode, key) and whether they are for bytes.
+TRANSLATION_TABLES = {}
 
 def getMode():
     while True:
@@ -22,31 +50,280 @@ def getKey():
         if (key >= 1 and key <= MAX_KEY_SIZE):
             return key
 
-def getTranslatedMessage(mode, message, key):
-    if mode[0] == 'd':
-        key = -key
-    translated = ''
-
-    for symbol in message:
-        symbol_index = SYMBOLS.find(symbol)
-        if symbol_index == -1:
-            # Means symbol not found in SYMBOLS
-            # Just add this symbol without any change
-            translated += symbol
+def getTranslationTable(mode, key, for_bytes=False):
+    # Return the str.translate table (or bytes.translate table if for_bytes) that encrypts or decrypts with key.
+    table_key = (mode[0], key, for_bytes)
+    if table_key not in TRANSLATION_TABLES:
+        if mode[0] == 'd':
+            key = -key
+        shift = key % len(SYMBOLS)
+        # A symbol listed twice in SYMBOLS translates from its first place, like SYMBOLS.find.
+        symbols = ''
+        shifted = ''
+        for symbol_index, symbol in enumerate(SYMBOLS):
+            if symbol not in symbols:
+                symbols += symbol
+                shifted += SYMBOLS[(symbol_index + shift) % len(SYMBOLS)]
+        # Symbols not in SYMBOLS are left unchanged. SYMBOLS is all ASCII, so
+        # the bytes of UTF-8 text outside it are never touched either.
+        if for_bytes:
+            TRANSLATION_TABLES[table_key] = bytes.maketrans(symbols.encode('ascii'), shifted.encode('ascii'))
         else:
-            # Encrypt or decypt:
-            symbol_index += key
-
-            if symbol_index >= len(SYMBOLS):
-                symbol_index -= len(SYMBOLS)
-            elif symbol_index < 0:
-                symbol_index += len(SYMBOLS)
-
-            translated += SYMBOLS[symbol_index]
-    return translated
-
-mode = getMode()
-message = getMessage()
-key = getKey()
-print('Your translated text is:')
-print(getTranslatedMessage(mode, message, key))
\ No newline at end of file
+            TRANSLATION_TABLES[table_key] = str.maketrans(symbols, shifted)
+    return TRANSLATION_TABLES[table_key]
+
+def getTranslatedMessage(mode, message, key):
+    return message.translate(getTranslationTable(mode, key))
+
+def translateStream(mode, key, input_file, output_file):
+    # Translate a binary file object into another, CHUNK_SIZE bytes at a time. Return the number of bytes.
+    table = getTranslationTable(mode, key, for_bytes=True)
+    total = 0
+    while True:
+        chunk = input_file.read(CHUNK_SIZE)
+        if not chunk:
+            return total
+        output_file.write(chunk.translate(table))
+        total += len(chunk)
+
+def translateFile(mode, key, input_path, output_path):
+    '''Encrypt or decrypt the file at input_path into output_path, where
+    '-' means stdin or stdout. Files are memory-mapped and translated a chunk
+    at a time, so memory use stays the same however big they are. Output
+    goes to a temporary file that replaces output_path only once it is
+    complete, so output_path can be input_path.
+    Return the number of bytes translated.'''
+    if output_path == '-':
+        try:
+            return translateFileTo(mode, key, input_path, sys.stdout.buffer)
+        finally:
+            sys.stdout.buffer.flush()
+    temp_path = output_path + '.tmp'
+    try:
+        with open(temp_path, 'wb') as output_file:
+            size = translateFileTo(mode, key, input_path, output_file)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return size
+
+def translateFileTo(mode, key, input_path, output_file):
+    # Translate the file at input_path ('-' for stdin) into the open binary output_file.
+    if input_path == '-':
+        return translateStream(mode, key, sys.stdin.buffer, output_file)
+    with open(input_path, 'rb') as input_file:
+        size = input_file.seek(0, 2)
+        if size == 0:
+            return 0  # Empty files can't be memory-mapped.
+        table = getTranslationTable(mode, key, for_bytes=True)
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, size, CHUNK_SIZE):
+                output_file.write(mapped[start:start + CHUNK_SIZE].translate(table))
+        return size
+
+def translateChunk(chunk):
+    '''Translate one piece of a file, given as a (mode, key, input_path,
+    temp_path, offset, length) tuple, writing it to the same offset of
+    temp_path. Return (temp_path, length).'''
+    mode, key, input_path, temp_path, offset, length = chunk
+    with open(input_path, 'rb') as input_file:
+        input_file.seek(offset)
+        data = input_file.read(length)
+    with open(temp_path, 'r+b') as temp_file:
+        temp_file.seek(offset)
+        temp_file.write(data.translate(getTranslationTable(mode, key, for_bytes=True)))
+    return temp_path, length
+
+def getDirectoryFiles(source_dir, dest_dir):
+    # Return a list of (input path, output path, size) for every file under source_dir.
+    files = []
+    for dir_path, dir_names, file_names in os.walk(source_dir):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            input_path = os.path.join(dir_path, file_name)
+            output_path = os.path.join(dest_dir, os.path.relpath(input_path, source_dir))
+            files.append((input_path, output_path, os.path.getsize(input_path)))
+    return files
+
+def translateDirectory(mode, key, source_dir, dest_dir, workers=None, chunk_size=BATCH_CHUNK_SIZE):
+    '''Encrypt or decrypt every file under source_dir into the same place
+    under dest_dir, across a pool of worker processes (one per core by
+    default). Files are split into chunk_size pieces, which can end at any
+    byte because each byte is translated on its own. The pieces are written
+    into a temporary file beside the output, created before any work starts,
+    which replaces the output only once it is complete. Prints progress
+    about once a second.
+    Return the number of bytes translated.'''
+    files = getDirectoryFiles(source_dir, dest_dir)
+    total_bytes = sum(size for input_path, output_path, size in files)
+    chunks_left = {}  # Temporary path -> [chunks not yet written, output path].
+    files_done = 0
+    bytes_done = 0
+    start_time = time.perf_counter()
+    last_report = start_time
+
+    try:
+        # Create every temporary file up front, so only this thread touches chunks_left.
+        chunks = []
+        for input_path, output_path, size in files:
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            temp_path = output_path + '.tmp'
+            with open(temp_path, 'wb') as temp_file:
+                temp_file.truncate(size)
+            if size == 0:
+                os.replace(temp_path, output_path)
+                files_done += 1
+                continue
+            chunks_left[temp_path] = [(size + chunk_size - 1) // chunk_size, output_path]
+            for offset in range(0, size, chunk_size):
+                chunks.append((mode, key, input_path, temp_path, offset, min(chunk_size, size - offset)))
+
+        with multiprocessing.Pool(workers) as pool:
+            for temp_path, length in pool.imap_unordered(translateChunk, chunks):
+                bytes_done += length
+                chunks_left[temp_path][0] -= 1
+                if chunks_left[temp_path][0] == 0:
+                    os.replace(temp_path, chunks_left.pop(temp_path)[1])
+                    files_done += 1
+                now = time.perf_counter()
+                if now - last_report >= 1:
+                    last_report = now
+                    print(f'{files_done}/{len(files)} files, {bytes_done / 2**20:.1f}/{total_bytes / 2**20:.1f} MiB '
+                          f'({bytes_done / 2**20 / (now - start_time):.1f} MiB/s)', file=sys.stderr)
+    finally:
+        for temp_path in chunks_left:  # Only files that were never finished are left.
+            os.remove(temp_path)
+
+    elapsed = time.perf_counter() - start_time
+    print(f'Translated {files_done} files, {bytes_done / 2**20:.1f} MiB in {elapsed:.1f}s '
+          f'({bytes_done / 2**20 / max(elapsed, 1e-9):.1f} MiB/s).', file=sys.stderr)
+    return bytes_done
+
+def checkNumpy():
+    # Raise ImportError if numpy, which cracking keys needs, isn't installed.
+    if np is None:
+        raise ImportError('cracking keys needs numpy (pip install numpy)')
+
+def getSymbolCounts(messages):
+    '''Return a (len(messages), len(SYMBOLS)) array counting how often each
+    symbol appears in each message, by its place in SYMBOLS. Characters that
+    aren't in SYMBOLS are not counted.'''
+    checkNumpy()
+    # Look up each byte's place in SYMBOLS, with len(SYMBOLS) for anything else.
+    symbol_indexes = np.full(256, len(SYMBOLS), dtype=np.intp)
+    for symbol in reversed(SYMBOLS):
+        symbol_indexes[ord(symbol)] = SYMBOLS.find(symbol)
+    counts = np.zeros((len(messages), len(SYMBOLS) + 1), dtype=np.int64)
+    for i, message in enumerate(messages):
+        if isinstance(message, str):
+            message = message.encode('utf-8')
+        counts[i] = np.bincount(symbol_indexes[np.frombuffer(message, dtype=np.uint8)],
+                                minlength=len(SYMBOLS) + 1)
+    return counts[:, :len(SYMBOLS)]
+
+def getKeyScoreMatrix():
+    '''Return a (MAX_KEY_SIZE, len(SYMBOLS)) array whose row for key k - 1
+    holds, for each ciphertext symbol, the log-probability of the English
+    letter it decrypts to with key k. Capitals are taken to be rare, so keys
+    that turn text into mostly capitals score badly.'''
+    checkNumpy()
+    total = sum(ENGLISH_LETTER_FREQUENCIES.values())
+    symbol_scores = []
+    for symbol in SYMBOLS:
+        case_fraction = UPPERCASE_FRACTION if symbol.isupper() else 1 - UPPERCASE_FRACTION
+        symbol_scores.append(np.log(case_fraction * ENGLISH_LETTER_FREQUENCIES[symbol.lower()] / total))
+    symbol_scores = np.array(symbol_scores)
+    keys = np.arange(1, MAX_KEY_SIZE + 1)
+    # Decrypting moves each symbol key places back through SYMBOLS.
+    decrypted = (np.arange(len(SYMBOLS))[np.newaxis, :] - keys[:, np.newaxis]) % len(SYMBOLS)
+    return symbol_scores[decrypted]
+
+def crackMessages(messages):
+    '''Score every key for every message at once. Return (keys, scores): for
+    each message, the keys ranked from most to least likely and the average
+    log-probability per letter of the text each decrypts to.'''
+    counts = getSymbolCounts(messages)
+    letters = np.maximum(counts.sum(axis=1, keepdims=True), 1)
+    scores = counts @ getKeyScoreMatrix().T / letters
+    ranking = np.argsort(-scores, axis=1, kind='stable')
+    return ranking + 1, np.take_along_axis(scores, ranking, axis=1)
+
+def crackMessage(message):
+    # Return a list of (key, score) pairs for message, most likely key first.
+    keys, scores = crackMessages([message])
+    return list(zip(keys[0].tolist(), scores[0].tolist()))
+
+def crackFile(input_path, top=5, lines=False):
+    '''Print the most likely keys for the ciphertext in input_path ('-' for
+    stdin), with the start of the message each decrypts to. If lines is true,
+    each line is cracked as a separate message and its best key printed.'''
+    if input_path == '-':
+        ciphertext = sys.stdin.buffer.read()
+    else:
+        with open(input_path, 'rb') as input_file:
+            ciphertext = input_file.read()
+    if not lines:
+        preview = ciphertext[:CRACK_PREVIEW_LENGTH * 4].decode('utf-8', 'replace')
+        for key, score in crackMessage(ciphertext)[:top]:
+            decrypted = getTranslatedMessage('decrypt', preview, key)[:CRACK_PREVIEW_LENGTH]
+            print(f'key {key:2}  score {score:7.3f}  {decrypted!r}')
+        return
+
+    messages = ciphertext.splitlines()
+    keys, scores = crackMessages(messages)
+    for message, key, score in zip(messages, keys[:, 0].tolist(), scores[:, 0].tolist()):
+        decrypted = getTranslatedMessage('decrypt', message.decode('utf-8', 'replace'), key)
+        print(f'key {key:2}  score {score:7.3f}  {decrypted[:CRACK_PREVIEW_LENGTH]!r}')
+
+def parseKey(text):
+    # Return the key in text, for argparse. Raise ArgumentTypeError if it isn't 1 to MAX_KEY_SIZE.
+    if not text.isdigit() or not 1 <= int(text) <= MAX_KEY_SIZE:
+        raise argparse.ArgumentTypeError(f'the key must be a number from 1 to {MAX_KEY_SIZE}')
+    return int(text)
+
+def playInteractive():
+    mode = getMode()
+    message = getMessage()
+    key = getKey()
+    print('Your translated text is:')
+    print(getTranslatedMessage(mode, message, key))
+
+def main():
+    parser = argparse.ArgumentParser(description='Caesar cipher. With no command, asks for a message to translate.')
+    subparsers = parser.add_subparsers(dest='command')
+    for mode in ['encrypt', 'decrypt']:
+        mode_parser = subparsers.add_parser(mode, help=f'{mode} a file or stdin')
+        mode_parser.add_argument('key', type=parseKey, help=f'key number (1-{MAX_KEY_SIZE})')
+        mode_parser.add_argument('input', nargs='?', default='-', help='file to read (default: stdin)')
+        mode_parser.add_argument('-o', '--output', default='-', help='file to write (default: stdout)')
+    crack_parser = subparsers.add_parser('crack', help='find the most likely keys for an encrypted file or stdin')
+    crack_parser.add_argument('input', nargs='?', default='-', help='file to read (default: stdin)')
+    crack_parser.add_argument('--top', type=int, default=5, help='number of keys to show (default 5)')
+    crack_parser.add_argument('--lines', action='store_true', help='crack each line as a separate message')
+    batch_parser = subparsers.add_parser('batch', help='encrypt or decrypt every file in a directory')
+    batch_parser.add_argument('mode', choices=['encrypt', 'decrypt'])
+    batch_parser.add_argument('key', type=parseKey, help=f'key number (1-{MAX_KEY_SIZE})')
+    batch_parser.add_argument('source', help='directory to read')
+    batch_parser.add_argument('dest', help='directory to write the translated files to')
+    batch_parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    batch_parser.add_argument('--chunk-size', type=int, default=BATCH_CHUNK_SIZE,
+                              help=f'bytes in each piece of work (default {BATCH_CHUNK_SIZE})')
+    args = parser.parse_args()
+
+    if args.command is None:
+        playInteractive()
+    elif args.command == 'batch':
+        if not os.path.isdir(args.source):
+            parser.error(f'{args.source} is not a directory')
+        translateDirectory(args.mode, args.key, args.source, args.dest, args.workers, args.chunk_size)
+    elif args.command == 'crack':
+        try:
+            crackFile(args.input, args.top, args.lines)
+        except ImportError as error:
+            parser.exit(1, f'{error}\n')
+    else:
+        translateFile(args.command, args.key, args.input, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,15 @@
 #! python3
 
+import argparse
+import math
+import mmap
+import multiprocessing
 import random
 import os
+import struct
 import time
 import sys
+import zlib
 
 HANGMAN_PICS = ['''
   +---+
@@ -57,14 +63,225 @@ words = {'Colors': 'red orange yellow green blue indigo violet white black brown
          'Fruits': 'apple orange lemon lime pear watermelon grape grapefruit cherry banana cantaloupe mango strawberry tomato'.split(),
          'Animals': 'bat bear beaver cat cougar crab deer dog donkey duck eagle fish frog goat leech lion lizard monkey moose mouse otter owl panda python rabbit rat shark sheep skunk squid tiger turkey turtle weasel whale wolf wombat zebra'.split()}
 
-def get_random_word(word_dict):
-    # This function returns a random string from the passed dictionary of list of strings and its key.
-    # 1st, randomly select a key from the dictionary:
-    word_key = random.choice(list(word_dict.keys()))
+# A word store file holds a word list so that games can be played from huge
+# dictionaries without loading them. After the header come the category
+# names (joined with newlines), a table of groups, one per category and word
+# length, then the offset of every word in the packed words that end the file.
+# Words are sorted by category, then length, so each group is one run of words.
+WORD_STORE_MAGIC = b'HMWORDS1'
+WORD_STORE_HEADER = struct.Struct('<8sIIII')  # Magic, word count, category count, group count, size of the names.
+WORD_STORE_GROUP = struct.Struct('<HHII')  # Category number, word length, first word, word count.
+WORD_STORE_OFFSET = struct.Struct('<I')
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+SOLVER_STRATEGIES = ['frequency', 'information']
+VOWELS = 'aeiou'
+SOLVER_CHUNK_SIZE = 2000  # Words each solver worker plays before reporting back.
 
-    # 2nd, randomly select a word from the key's list in the dictionary:
-    word_index = random.randint(0, len(word_dict[word_key]) - 1)
-    return [word_dict[word_key][word_index], word_key]
+# A difficulty index is a sidecar file next to a word store (at the store's
+# path plus DIFFICULTY_SUFFIX) that sorts its words into the E, M and H bands.
+# The header records the store's fingerprint, so an index left over from an
+# older version of the store is ignored. After the header come the number of
+# words in each band, a score from 0 to 255 for every word, and then each
+# band's word numbers in increasing order.
+DIFFICULTY_SUFFIX = '.difficulty'
+DIFFICULTY_MAGIC = b'HMDIFF02'
+DIFFICULTY_HEADER = struct.Struct('<8sIIQI')  # Magic, word count, band count, store size, CRC-32 of the store's offsets.
+DIFFICULTY_BANDS = ['E', 'M', 'H']
+# How much each part of a word's difficulty score counts.
+MISS_WEIGHT = 1.0  # Per guess the reference solver misses.
+RARITY_WEIGHT = 0.5  # Per bit of surprisal of the word's average letter.
+DISTINCT_LETTERS_WEIGHT = -0.2  # Per different letter; more letters are easier to hit.
+PATTERN_WEIGHT = 0.5  # Per doubling of the words with the same consonant blanks.
+
+def build_word_store(word_dict):
+    # Returns the bytes of a word store holding the passed dictionary of category names to lists of words.
+    categories = sorted(word_dict)
+    groups = []
+    offsets = [0]
+    packed_words = bytearray()
+    for category_number, category in enumerate(categories):
+        category_words = sorted(set(word_dict[category]), key=lambda word: (len(word), word))
+        for word in category_words:
+            if groups == [] or groups[-1][0] != category_number or groups[-1][1] != len(word):
+                groups.append([category_number, len(word), len(offsets) - 1, 0])
+            groups[-1][3] += 1
+            packed_words += word.encode('ascii')
+            offsets.append(len(packed_words))
+    if len(packed_words) >= 2 ** 32:
+        raise ValueError('too many letters for a word store')
+
+    names = '\n'.join(categories).encode('utf-8')
+    parts = [WORD_STORE_HEADER.pack(WORD_STORE_MAGIC, len(offsets) - 1, len(categories), len(groups), len(names)), names]
+    parts.extend(WORD_STORE_GROUP.pack(*group) for group in groups)
+    parts.append(struct.pack(f'<{len(offsets)}I', *offsets))
+    parts.append(packed_words)
+    return b''.join(parts)
+
+def write_word_store(word_dict, path):
+    # Writes a word store file for the passed dictionary, replacing any file at path only once it is complete.
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as store_file:
+        store_file.write(build_word_store(word_dict))
+    os.replace(temp_path, path)
+
+def read_word_list(path, default_category='Words'):
+    # Returns a dictionary of category names to lists of words read from a text file.
+    # Each line is a word, or a category and a word separated by a tab. Words that aren't all letters are skipped.
+    word_dict = {}
+    with open(path, encoding='utf-8') as word_file:
+        for line in word_file:
+            category, tab, word = line.strip().rpartition('\t')
+            word = word.lower()
+            if word == '' or word.strip(LETTERS) != '':
+                continue
+            word_dict.setdefault(category if tab else default_category, []).append(word)
+    return word_dict
+
+class WordStore:
+    '''A word list in the word store format, read straight from a file
+    through mmap (or from bytes). Only the small table of groups is loaded,
+    so opening a store is just as fast however many words it has.'''
+
+    def __init__(self, data):
+        self.data = data
+        magic, self.word_count, category_count, group_count, names_size = WORD_STORE_HEADER.unpack_from(data, 0)
+        if magic != WORD_STORE_MAGIC:
+            raise ValueError('not a word store')
+        position = WORD_STORE_HEADER.size
+        self.categories = bytes(data[position:position + names_size]).decode('utf-8').split('\n')
+        position += names_size
+        self.groups = list(WORD_STORE_GROUP.iter_unpack(data[position:position + group_count * WORD_STORE_GROUP.size]))
+        position += group_count * WORD_STORE_GROUP.size
+        self.offsets_position = position
+        self.words_position = position + (self.word_count + 1) * WORD_STORE_OFFSET.size
+
+        self.category_ranges = {}  # Category name -> [first word, word count].
+        self.length_groups = {}  # Word length -> list of (category name, first word, word count).
+        for category_number, length, first_word, count in self.groups:
+            category = self.categories[category_number]
+            self.category_ranges.setdefault(category, [first_word, 0])[1] += count
+            self.length_groups.setdefault(length, []).append((category, first_word, count))
+
+        self.difficulty = None  # The DifficultyIndex for these words, if there is one.
+
+    @classmethod
+    def open(cls, path):
+        # Returns the WordStore in the file at path, memory-mapped, with its difficulty index if it has one.
+        with open(path, 'rb') as store_file:
+            word_store = cls(mmap.mmap(store_file.fileno(), 0, access=mmap.ACCESS_READ))
+        if os.path.exists(path + DIFFICULTY_SUFFIX):
+            try:
+                difficulty = DifficultyIndex.open(path + DIFFICULTY_SUFFIX)
+            except ValueError:
+                return word_store  # It's in an older format.
+            if difficulty.fingerprint == word_store.get_fingerprint():
+                word_store.difficulty = difficulty
+            else:
+                difficulty.close()  # It was made for an older version of the store.
+        return word_store
+
+    def get_fingerprint(self):
+        # Returns (size of the store, CRC-32 of its table of word offsets), which any change to the words changes.
+        offsets = self.data[self.offsets_position:self.words_position]
+        return len(self.data), zlib.crc32(offsets)
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        if self.difficulty is not None:
+            self.difficulty.close()
+
+    def get_word(self, index):
+        # Returns the word with the passed index.
+        start, end = struct.unpack_from('<II', self.data, self.offsets_position + index * WORD_STORE_OFFSET.size)
+        return bytes(self.data[self.words_position + start:self.words_position + end]).decode('ascii')
+
+    def get_random_word(self, category=None, length=None, band=None, rng=random):
+        # Returns a random [word, category], like the game always has: a random category, then a random word in it.
+        # Only words in the passed category, of the passed length and in the passed
+        # difficulty band (a number) are chosen. Returns None if there are none.
+        if length is None:
+            choices = [(name, first_word, count) for name, (first_word, count) in self.category_ranges.items()]
+        else:
+            choices = self.length_groups.get(length, [])
+        choices = [choice for choice in choices if category in (None, choice[0])]
+        if band is None:
+            if choices == []:
+                return None
+            category, first_word, count = rng.choice(choices)
+            return [self.get_word(first_word + rng.randrange(count)), category]
+
+        # Each band lists its words in order, so the words of a category or group are one run of it.
+        choices = [(name, self.difficulty.find_band_words(band, first_word, first_word + count))
+                   for name, first_word, count in choices]
+        choices = [(name, (start, end)) for name, (start, end) in choices if start < end]
+        if choices == []:
+            return None
+        category, (start, end) = rng.choice(choices)
+        return [self.get_word(self.difficulty.get_band_word(band, rng.randrange(start, end))), category]
+
+class DifficultyIndex:
+    '''The difficulty bands of a word store's words, read from a sidecar file
+    through mmap (or from bytes).'''
+
+    def __init__(self, data):
+        self.data = data
+        if len(data) < DIFFICULTY_HEADER.size or data[:len(DIFFICULTY_MAGIC)] != DIFFICULTY_MAGIC:
+            raise ValueError('not a difficulty index')
+        magic, self.word_count, band_count, *self.fingerprint = DIFFICULTY_HEADER.unpack_from(data, 0)
+        self.fingerprint = tuple(self.fingerprint)  # The fingerprint of the word store it was made for.
+        position = DIFFICULTY_HEADER.size
+        self.band_sizes = struct.unpack_from(f'<{band_count}I', data, position)
+        position += band_count * 4
+        position += self.word_count  # Skip the scores, which only tools that read the file use.
+        self.band_positions = []
+        for band_size in self.band_sizes:
+            self.band_positions.append(position)
+            position += band_size * 4
+
+    @classmethod
+    def open(cls, path):
+        # Returns the DifficultyIndex in the file at path, memory-mapped.
+        with open(path, 'rb') as index_file:
+            data = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(data)
+        except ValueError:
+            data.close()
+            raise
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def get_band_word(self, band, position):
+        # Returns the index of the word at the passed position in a band's list.
+        return struct.unpack_from('<I', self.data, self.band_positions[band] + position * 4)[0]
+
+    def find_band_words(self, band, first_word, end_word):
+        # Returns (start, end): the positions in a band's list of the words numbered from first_word up to end_word.
+        positions = []
+        for word in [first_word, end_word]:
+            low = 0
+            high = self.band_sizes[band]
+            while low < high:  # Find the first position with a word numbered word or more.
+                middle = (low + high) // 2
+                if self.get_band_word(band, middle) < word:
+                    low = middle + 1
+                else:
+                    high = middle
+            positions.append(low)
+        return positions[0], positions[1]
+
+def get_random_word(word_store, category=None, length=None, difficulty=None):
+    # This function returns a random word from the word store and its category.
+    # If difficulty is E, M or H and the store has a difficulty index, the word comes from that band
+    # (or from any band, if that one has no words in the category with that many letters).
+    if difficulty is not None and word_store.difficulty is not None:
+        word = word_store.get_random_word(category, length, DIFFICULTY_BANDS.index(difficulty))
+        if word is not None:
+            return word
+    return word_store.get_random_word(category, length)
 
 def display_board(missed_letters, correct_letters, secret_word):
     #os.system('cls')
@@ -113,63 +330,384 @@ def print_slow(str):
         sys.stdout.write(letter)
         time.sleep(.2)
 
-# Beginning of Game
-print_slow('- H A N G M A N -')
-
-difficulty = 'X'
-while difficulty not in ['E', 'M', 'H']:
-    print('\nEnter difficulty: E)asy, M)edium, or H)ard')
-    difficulty = input().upper()
-if difficulty == 'M':
-    del HANGMAN_PICS[8]
-    del HANGMAN_PICS[7]
-if difficulty == 'H':
-    del HANGMAN_PICS[8]
-    del HANGMAN_PICS[7]
-    del HANGMAN_PICS[5]
-    del HANGMAN_PICS[3]
-
-missed_letters = ''
-correct_letters = ''
-secret_word, secret_set = get_random_word(words)
-game_is_over = False
-
-while True:
-    print(' - - - - - - - - - - - - - - - - - - - ')
-    print(f'*The word category is: {secret_set}')
-    display_board(missed_letters, correct_letters, secret_word)
-
-    # Let the player enter a letter.
-    guess = get_guess(missed_letters + correct_letters)
-
-    if guess in secret_word:
-        correct_letters = correct_letters + guess
-
-        # Check if the player has won.
-        found_all_letters = True
-        for i in range(len(secret_word)):
-            if secret_word[i] not in correct_letters:
-                found_all_letters = False
-                break
-        if found_all_letters:
-            print(f'Yes! The secret word is {secret_word}! You won!')
-            game_is_over = True
-
-    else:
-        missed_letters = missed_letters + guess
-
-        # Check if player has guessed to many times and has lost.
-        if len(missed_letters) == len(HANGMAN_PICS) - 1:
-            display_board(missed_letters, correct_letters, secret_word)
-            print(f'You have run out of guesses!\nAfter {len(missed_letters)} missed guesses and {len(correct_letters)} correct guesses, the word was "{secret_word}".')
-            game_is_over = True
-
-    # Ask the player if they want to play again (but only if the game is done).
-    if game_is_over:
-        if play_again():
-            missed_letters = ''
-            correct_letters = ''
-            game_is_over = False
-            secret_word, secret_set = get_random_word(words)
+class LetterIndex:
+    '''Bitmaps over a list of words that all have the same length: for each
+    position and letter, which words have that letter there, and for each
+    letter, which words have it anywhere. Bit i stands for words[i].'''
+
+    def __init__(self, words):
+        self.words = words
+        self.all_words = (1 << len(words)) - 1
+        self.choices = {}  # (strategy, letters shown, missed letters) -> the letter the solver guesses then.
+        length = len(words[0]) if words else 0
+        self.position_bits = [dict.fromkeys(LETTERS, 0) for i in range(length)]
+        for word_number, word in enumerate(words):
+            bit = 1 << word_number
+            for i, letter in enumerate(word):
+                self.position_bits[i][letter] |= bit
+        self.letter_bits = {}
+        for letter in LETTERS:
+            bits = 0
+            for letter_positions in self.position_bits:
+                bits |= letter_positions[letter]
+            self.letter_bits[letter] = bits
+
+class HangmanSolver:
+    '''Keeps track of which words in a LetterIndex still fit the letters
+    guessed so far, and picks the next letter to guess. The frequency
+    strategy guesses the letter most of those words have, and the
+    information strategy the letter whose answer splits them up the most.'''
+
+    def __init__(self, letter_index, strategy='frequency'):
+        self.index = letter_index
+        self.strategy = strategy
+        self.candidates = letter_index.all_words
+        self.correct_letters = ''
+        self.missed_letters = ''
+        self.blanks = '_' * len(letter_index.position_bits)
+
+    def add_guess(self, letter, secret_word):
+        # Keeps only the words that have letter in exactly the same places as secret_word.
+        if letter in secret_word:
+            self.correct_letters += letter
+            for i, letter_positions in enumerate(self.index.position_bits):
+                if secret_word[i] == letter:
+                    self.candidates &= letter_positions[letter]
+                    self.blanks = self.blanks[:i] + letter + self.blanks[i+1:]
+                else:
+                    self.candidates &= ~letter_positions[letter]
         else:
-            break
+            self.missed_letters += letter
+            self.candidates &= ~self.index.letter_bits[letter]
+
+    def get_information(self, letter):
+        # Returns the entropy of where letter turns up in the words that fit, in bits.
+        groups = [self.candidates & ~self.index.letter_bits[letter], self.candidates & self.index.letter_bits[letter]]
+        for letter_positions in self.index.position_bits:
+            # Split the words with the letter by whether they have it in this position.
+            groups = groups[:1] + [part for group in groups[1:]
+                                   for part in (group & letter_positions[letter], group & ~letter_positions[letter])
+                                   if part]
+        total = self.candidates.bit_count()
+        return -sum(group.bit_count() / total * math.log2(group.bit_count() / total) for group in groups if group)
+
+    def choose_letter(self):
+        # Returns the next letter to guess. Games against words in the same
+        # index share their first few choices, so each choice is remembered.
+        choice_key = (self.strategy, self.blanks, ''.join(sorted(self.missed_letters)))
+        if choice_key not in self.index.choices:
+            self.index.choices[choice_key] = self.find_best_letter()
+        return self.index.choices[choice_key]
+
+    def find_best_letter(self):
+        best_letter = None
+        best_score = None
+        for letter in LETTERS:
+            if letter in self.correct_letters or letter in self.missed_letters:
+                continue
+            count = (self.candidates & self.index.letter_bits[letter]).bit_count()
+            if count == 0 and best_letter is not None:
+                continue  # No word that fits has it, so it can only be a miss.
+            if self.strategy == 'information':
+                # Once nothing more can be learned, guess the letters the words are sure to have.
+                score = (self.get_information(letter), count)
+            else:
+                score = count
+            if best_score is None or score > best_score:
+                best_letter = letter
+                best_score = score
+        return best_letter
+
+def solve_word(letter_index, secret_word, strategy='frequency'):
+    # Returns the number of guesses and of missed guesses the solver takes to find secret_word.
+    solver = HangmanSolver(letter_index, strategy)
+    while any(letter not in solver.correct_letters for letter in secret_word):
+        solver.add_guess(solver.choose_letter(), secret_word)
+    return len(solver.correct_letters) + len(solver.missed_letters), len(solver.missed_letters)
+
+def open_word_store(path, with_difficulty=True):
+    # Returns the WordStore in the file at path, or one holding the built-in words if path is None.
+    # The built-in words are scored for difficulty here, unless with_difficulty is False.
+    if path:
+        return WordStore.open(path)
+    word_store = WordStore(build_word_store(words))
+    if with_difficulty:
+        init_solver_worker(None, get_letter_surprisal(word_store), word_store)
+        scores = []
+        for chunk in get_solver_chunks(word_store, 'frequency'):
+            scores.extend(score_words(chunk))
+        word_store.difficulty = DifficultyIndex(build_difficulty_index(scores, word_store.get_fingerprint()))
+    return word_store
+
+def get_solver_chunks(word_store, strategy):
+    # Returns a list of (group number, first word, word count, strategy) for the solver workers, in word order.
+    chunks = []
+    for group_number, (category_number, length, first_word, count) in enumerate(word_store.groups):
+        for start in range(first_word, first_word + count, SOLVER_CHUNK_SIZE):
+            chunks.append((group_number, start, min(SOLVER_CHUNK_SIZE, first_word + count - start), strategy))
+    return chunks
+
+SOLVER_WORD_STORE = None  # The word store each solver worker process plays from.
+SOLVER_LETTER_SURPRISAL = None  # Letter -> bits of surprisal, for scoring difficulty.
+SOLVER_INDEXES = {}  # Group number -> LetterIndex, built by a worker the first time it needs one.
+
+def init_solver_worker(path, letter_surprisal=None, word_store=None):
+    global SOLVER_WORD_STORE, SOLVER_LETTER_SURPRISAL
+    SOLVER_WORD_STORE = word_store if word_store is not None else open_word_store(path, with_difficulty=False)
+    SOLVER_LETTER_SURPRISAL = letter_surprisal
+    SOLVER_INDEXES.clear()
+
+def get_group_index(group_number):
+    # Returns the LetterIndex of a group of the solver worker's word store.
+    if group_number not in SOLVER_INDEXES:
+        SOLVER_INDEXES.clear()  # Chunks come in group order, so only the latest index is kept.
+        category_number, length, first_word, count = SOLVER_WORD_STORE.groups[group_number]
+        SOLVER_INDEXES[group_number] = LetterIndex(
+            [SOLVER_WORD_STORE.get_word(i) for i in range(first_word, first_word + count)])
+    return SOLVER_INDEXES[group_number]
+
+def solve_words(chunk):
+    '''Plays one run of words in a group of the solver worker's word store,
+    given as a (group number, first word, word count, strategy) tuple. The
+    solver knows the category and length, as a player does.
+    Returns a list of (word, category, guesses, missed guesses).'''
+    group_number, first_word, count, strategy = chunk
+    category_number, length, group_first_word, group_count = SOLVER_WORD_STORE.groups[group_number]
+    letter_index = get_group_index(group_number)
+    results = []
+    for word_number in range(first_word - group_first_word, first_word - group_first_word + count):
+        secret_word = letter_index.words[word_number]
+        guesses, misses = solve_word(letter_index, secret_word, strategy)
+        results.append((secret_word, SOLVER_WORD_STORE.categories[category_number], guesses, misses))
+    return results
+
+def solve_word_store(path, strategy='frequency', workers=None, output_path=None):
+    '''Lets the solver play every word in the word store at path (or the
+    built-in words) across a pool of worker processes, one per core by
+    default. Writes each word's guesses and missed guesses to output_path
+    as tab-separated lines, if given, and prints a summary.'''
+    word_store = open_word_store(path, with_difficulty=False)
+    max_misses = len(HANGMAN_PICS) - 1
+    chunks = get_solver_chunks(word_store, strategy)
+    word_count = word_store.word_count
+    word_store.close()
+
+    start_time = time.perf_counter()
+    last_report = start_time
+    words_played = 0
+    total_guesses = 0
+    total_misses = 0
+    words_won = 0
+    hardest = []  # (missed guesses, word) of the words with the most misses.
+    output_file = open(output_path, 'w') if output_path else None
+    with multiprocessing.Pool(workers, init_solver_worker, (path,)) as pool:
+        for results in pool.imap(solve_words, chunks):
+            for secret_word, category, guesses, misses in results:
+                if output_file:
+                    output_file.write(f'{secret_word}\t{category}\t{guesses}\t{misses}\n')
+                words_played += 1
+                total_guesses += guesses
+                total_misses += misses
+                words_won += misses < max_misses
+                hardest.append((misses, secret_word))
+            hardest = sorted(hardest, reverse=True)[:10]
+            now = time.perf_counter()
+            if now - last_report >= 1:
+                last_report = now
+                print(f'{words_played}/{word_count} words ({words_played / (now - start_time):.0f} words/s)')
+    if output_file:
+        output_file.close()
+
+    elapsed = time.perf_counter() - start_time
+    print(f'Played {words_played} words with the {strategy} strategy in {elapsed:.1f}s '
+          f'({words_played / max(elapsed, 1e-9):.0f} words/s).')
+    print(f'Won {words_won / max(words_played, 1):.2%} with {max_misses} misses allowed. '
+          f'Average: {total_guesses / max(words_played, 1):.2f} guesses, {total_misses / max(words_played, 1):.2f} missed.')
+    print('Hardest words: ' + ', '.join(f'{word} ({misses} missed)' for misses, word in hardest))
+
+def get_letter_surprisal(word_store):
+    # Returns a dictionary of each letter to -log2 of the share of words in the store that have it.
+    word_counts = dict.fromkeys(LETTERS, 1)  # Start at one so that no letter is infinitely rare.
+    for i in range(word_store.word_count):
+        for letter in set(word_store.get_word(i)):
+            word_counts[letter] += 1
+    return {letter: -math.log2(count / (word_store.word_count + 1)) for letter, count in word_counts.items()}
+
+def get_vowel_pattern(word):
+    # Returns the word as a player sees it once all the vowels are guessed, like _a__ for cart.
+    return ''.join(letter if letter in VOWELS else '_' for letter in word)
+
+def get_difficulty_score(word, misses, letter_surprisal, pattern_count):
+    # Returns how hard word is to guess, given the guesses the reference solver missed,
+    # the surprisal of each letter and how many words in its group share its vowel pattern.
+    letters = set(word)
+    rarity = sum(letter_surprisal[letter] for letter in letters) / len(letters)
+    return (MISS_WEIGHT * misses + RARITY_WEIGHT * rarity + DISTINCT_LETTERS_WEIGHT * len(letters)
+            + PATTERN_WEIGHT * math.log2(pattern_count))
+
+def score_words(chunk):
+    # Returns the difficulty scores of one run of words in a group of the solver worker's word store,
+    # given as a (group number, first word, word count, strategy) tuple, playing them with the reference strategy.
+    group_number, first_word, count, strategy = chunk
+    letter_index = get_group_index(group_number)
+    if not hasattr(letter_index, 'pattern_counts'):
+        letter_index.pattern_counts = {}
+        for word in letter_index.words:
+            pattern = get_vowel_pattern(word)
+            letter_index.pattern_counts[pattern] = letter_index.pattern_counts.get(pattern, 0) + 1
+    group_first_word = SOLVER_WORD_STORE.groups[group_number][2]
+    scores = []
+    for word_number in range(first_word - group_first_word, first_word - group_first_word + count):
+        word = letter_index.words[word_number]
+        misses = solve_word(letter_index, word, strategy)[1]
+        scores.append(get_difficulty_score(word, misses, SOLVER_LETTER_SURPRISAL,
+                                           letter_index.pattern_counts[get_vowel_pattern(word)]))
+    return scores
+
+def build_difficulty_index(scores, fingerprint):
+    # Returns the bytes of a difficulty index for words with the passed scores, one in each band of equal size,
+    # for the word store with the passed fingerprint.
+    ranked = sorted(range(len(scores)), key=lambda word: scores[word])
+    bands = [sorted(ranked[len(ranked) * band // len(DIFFICULTY_BANDS):len(ranked) * (band + 1) // len(DIFFICULTY_BANDS)])
+             for band in range(len(DIFFICULTY_BANDS))]
+    low = min(scores, default=0)
+    high = max(scores, default=0)
+    scale = 255 / (high - low) if high > low else 0
+    parts = [DIFFICULTY_HEADER.pack(DIFFICULTY_MAGIC, len(scores), len(bands), *fingerprint),
+             struct.pack(f'<{len(bands)}I', *[len(band_words) for band_words in bands]),
+             bytes(round((score - low) * scale) for score in scores)]
+    parts.extend(struct.pack(f'<{len(band_words)}I', *band_words) for band_words in bands)
+    return b''.join(parts)
+
+def score_word_store(path, workers=None):
+    '''Scores how hard every word in the word store at path is, playing them
+    with the reference (frequency) solver across a pool of worker processes,
+    and writes the difficulty index next to the store.'''
+    word_store = WordStore.open(path)
+    letter_surprisal = get_letter_surprisal(word_store)
+    chunks = get_solver_chunks(word_store, 'frequency')
+    fingerprint = word_store.get_fingerprint()
+    word_store.close()
+
+    start_time = time.perf_counter()
+    scores = []
+    with multiprocessing.Pool(workers, init_solver_worker, (path, letter_surprisal)) as pool:
+        for chunk_scores in pool.imap(score_words, chunks):
+            scores.extend(chunk_scores)
+    temp_path = path + DIFFICULTY_SUFFIX + '.tmp'
+    with open(temp_path, 'wb') as index_file:
+        index_file.write(build_difficulty_index(scores, fingerprint))
+    os.replace(temp_path, path + DIFFICULTY_SUFFIX)
+
+    ranked = sorted(scores)
+    cutoffs = [ranked[len(ranked) * band // len(DIFFICULTY_BANDS)] for band in range(1, len(DIFFICULTY_BANDS))]
+    print(f'Scored {len(scores)} words in {time.perf_counter() - start_time:.1f}s and wrote {path + DIFFICULTY_SUFFIX}.')
+    print('Band cutoffs: ' + ', '.join(f'{score:.2f}' for score in cutoffs))
+
+def play_game(word_store, category=None, length=None):
+    # Plays games of hangman with words from the word store until the player wants to stop.
+    print_slow('- H A N G M A N -')
+
+    difficulty = 'X'
+    while difficulty not in ['E', 'M', 'H']:
+        print('\nEnter difficulty: E)asy, M)edium, or H)ard')
+        difficulty = input().upper()
+    if difficulty == 'M':
+        del HANGMAN_PICS[8]
+        del HANGMAN_PICS[7]
+    if difficulty == 'H':
+        del HANGMAN_PICS[8]
+        del HANGMAN_PICS[7]
+        del HANGMAN_PICS[5]
+        del HANGMAN_PICS[3]
+
+    missed_letters = ''
+    correct_letters = ''
+    secret_word, secret_set = get_random_word(word_store, category, length, difficulty)
+    game_is_over = False
+
+    while True:
+        print(' - - - - - - - - - - - - - - - - - - - ')
+        print(f'*The word category is: {secret_set}')
+        display_board(missed_letters, correct_letters, secret_word)
+
+        # Let the player enter a letter.
+        guess = get_guess(missed_letters + correct_letters)
+
+        if guess in secret_word:
+            correct_letters = correct_letters + guess
+
+            # Check if the player has won.
+            found_all_letters = True
+            for i in range(len(secret_word)):
+                if secret_word[i] not in correct_letters:
+                    found_all_letters = False
+                    break
+            if found_all_letters:
+                print(f'Yes! The secret word is {secret_word}! You won!')
+                game_is_over = True
+
+        else:
+            missed_letters = missed_letters + guess
+
+            # Check if player has guessed to many times and has lost.
+            if len(missed_letters) == len(HANGMAN_PICS) - 1:
+                display_board(missed_letters, correct_letters, secret_word)
+                print(f'You have run out of guesses!\nAfter {len(missed_letters)} missed guesses and {len(correct_letters)} correct guesses, the word was "{secret_word}".')
+                game_is_over = True
+
+        # Ask the player if they want to play again (but only if the game is done).
+        if game_is_over:
+            if play_again():
+                missed_letters = ''
+                correct_letters = ''
+                game_is_over = False
+                secret_word, secret_set = get_random_word(word_store, category, length, difficulty)
+            else:
+                break
+
+def main():
+    parser = argparse.ArgumentParser(description='Hangman. With no command, play a game.')
+    parser.add_argument('--words', metavar='PATH', help='word store file to take words from (default: the built-in words)')
+    parser.add_argument('--category', help='only play words from this category')
+    parser.add_argument('--length', type=int, help='only play words with this many letters')
+    subparsers = parser.add_subparsers(dest='command')
+    build_parser = subparsers.add_parser('build', help='build a word store file from a text word list')
+    build_parser.add_argument('source', help='text file with a word, or a category, tab and word, on each line')
+    build_parser.add_argument('output', help='word store file to write')
+    build_parser.add_argument('--default-category', default='Words',
+                              help='category for words listed without one (default Words)')
+    solve_parser = subparsers.add_parser('solve', help='let a solver play every word and count its guesses')
+    solve_parser.add_argument('--strategy', choices=SOLVER_STRATEGIES, default='frequency',
+                              help='how the solver picks letters (default frequency)')
+    solve_parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    solve_parser.add_argument('--output', metavar='PATH', help="write each word's guess counts to PATH")
+    score_parser = subparsers.add_parser('score', help="write a difficulty index for the --words store's words")
+    score_parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        word_dict = read_word_list(args.source, args.default_category)
+        write_word_store(word_dict, args.output)
+        print(f'Wrote {sum(len(set(category_words)) for category_words in word_dict.values())} words '
+              f'in {len(word_dict)} categories to {args.output}.')
+        return
+
+    try:
+        if args.command == 'score':
+            if not args.words:
+                parser.error('score needs a word store given with --words')
+            score_word_store(args.words, args.workers)
+            return
+        if args.command == 'solve':
+            solve_word_store(args.words, args.strategy, args.workers, args.output)
+            return
+        word_store = open_word_store(args.words)
+    except (OSError, ValueError) as error:
+        parser.error(f"can't read the word store: {error}")
+    if get_random_word(word_store, args.category, args.length) is None:
+        parser.error('there are no words in that category with that many letters')
+    play_game(word_store, args.category, args.length)
+
+if __name__ == '__main__':
+    main()
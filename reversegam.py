@@ -1,68 +1,226 @@
 # Reversegam: a clone of Othello/Reversi.
+import argparse
+import collections
+import json
+import mmap
+import multiprocessing
+import os
+import queue
 import random
+import struct
 import sys
+import threading
+import time
+try:
+    import numpy as np
+except ImportError:
+    np = None  # NumPy is only needed by the batch functions.
 WIDTH = 8  # Board is 8 spaces wide.
 HEIGHT = 8  # Board is 8 spaces tall.
+MIN_BOARD_SIZE = 4  # setBoardSize() accepts even widths and heights from 4...
+MAX_BOARD_SIZE = 16  # ...up to 16.
+COMPUTER_SEARCH_DEPTH = 4  # How many moves ahead the computer looks.
+COMPUTER_MAX_NODES = 50000  # Most positions the computer searches per move.
+COMPUTER_TIME_LIMIT = 2  # Most seconds the computer searches per move.
+PONDER_MAX_DEPTH = 12  # How deep the computer thinks ahead during the player's turn.
+ENDGAME_EMPTIES = 12  # Solve the game exactly once this few spaces are empty.
+ENDGAME_TIME_LIMIT = 5  # Seconds the endgame solver may take before giving up.
+ENDGAME_MAX_NODES = 1000000  # Positions a tournament player's endgame solver may search instead.
+OPENING_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reversegam_book.bin')
+
+def setBoardSize(width, height):
+    '''Make every function in this module use a width x height board.
+    This rebuilds the bitboard, search and opening book tables, so call it
+    before starting a game, not during one.'''
+    global WIDTH, HEIGHT, FULL_MASK, DIRECTION_SHIFTS, RAY_MASKS, SQUARE_WEIGHTS, WEIGHT_MASKS, INFINITY
+    global ZOBRIST_KEYS, ZOBRIST_FLIP_KEYS, ZOBRIST_O_TO_MOVE, PARITY_REGION_MASKS
+    global SYMMETRY_MAPS, INVERSE_SYMMETRY_MAPS
+    for size in (width, height):
+        if size % 2 != 0 or not MIN_BOARD_SIZE <= size <= MAX_BOARD_SIZE:
+            raise ValueError(f'Board sides must be even numbers from {MIN_BOARD_SIZE} to {MAX_BOARD_SIZE}.')
+    WIDTH = width
+    HEIGHT = height
+    FULL_MASK = (1 << (WIDTH * HEIGHT)) - 1
+    DIRECTION_SHIFTS = getDirectionShifts()
+    RAY_MASKS = getRayMasks()
+    SQUARE_WEIGHTS = getSquareWeights()
+    WEIGHT_MASKS = getWeightMasks()
+    INFINITY = WIDTH * HEIGHT * FINAL_DISC_SCORE + 1
+    ZOBRIST_KEYS, ZOBRIST_FLIP_KEYS, ZOBRIST_O_TO_MOVE = getZobristKeys()
+    PARITY_REGION_MASKS = getParityRegionMasks()
+    SYMMETRY_MAPS = getSymmetryMaps()
+    INVERSE_SYMMETRY_MAPS = [[index_map.index(i) for i in range(WIDTH * HEIGHT)] for index_map in SYMMETRY_MAPS]
+    TRANSPOSITION_TABLE.clear()  # Its keys were for the old size.
+
+def getColumnLabels():
+    # Return the lines of digits that number the columns, tens above ones.
+    digits = len(str(WIDTH))
+    numbers = [str(x + 1).rjust(digits) for x in range(WIDTH)]
+    return [''.join(number[i] for number in numbers) for i in range(digits)]
 
 def drawBoard(board):
     # Print the board passed to this function. Return None.
-    print('  12345678')
-    print(' +--------+')
+    margin = len(str(HEIGHT))
+    for line in getColumnLabels():
+        print(' ' * (margin + 1) + line)
+    print(' ' * margin + '+' + '-' * WIDTH + '+')
     for y in range(HEIGHT):
-        print(f'{y+1}|', end='')
+        print(f'{y+1:>{margin}}|', end='')
         for x in range(WIDTH):
             print(board[x][y], end='')
         print(f'|{y+1}')
-    print(' +--------+')
-    print('  12345678')
+    print(' ' * margin + '+' + '-' * WIDTH + '+')
+    for line in getColumnLabels():
+        print(' ' * (margin + 1) + line)
 
 def getNewBoard():
     # Creates a brand-new, blank board data structure.
     board = []
     for i in range(WIDTH):
-        board.append([' ', ' ', ' ', ' ', ' ', ' ', ' ', ' '])
+        board.append([' '] * HEIGHT)
     return board
 
 def isValidMove(board, tile, x_start, y_start):
     # Returns False if the player's move on space x_start, y_start is invalid.
     # If it is a valid move, return a list of spaces that would become the player's if they made a move here.
-    if board[x_start][y_start] != ' ' or not isOnBoard(x_start, y_start):
+    if not isOnBoard(x_start, y_start) or board[x_start][y_start] != ' ':
         return False
-    if tile == 'X':
-        other_tile = 'O'
-    else:
-        other_tile = 'X'
-    tiles_to_flip = []
+    own, opp = getTileBitboards(board, tile)
+    tiles_to_flip = getFlipsBits(own, opp, 1 << (x_start * HEIGHT + y_start))
 
-    for x_direction, y_direction in [[0, 1], [1, 1], [1, 0], [1, -1],
-                                     [0, -1], [-1, -1], [-1, 0], [-1, 1]]:
-        x, y = x_start, y_start
-        x += x_direction  # First step in the x direction
-        y += y_direction  # First step in the y direction
-        while isOnBoard(x, y) and board[x][y] == other_tile:
-            # Keep moving in this x and y direction.
-            x += x_direction
-            y += y_direction
-
-            if isOnBoard(x,y) and board[x][y] == tile:
-                ''' There are pieces to flip over. Go in the reverse
-                    direction until we reach the original space, nothing
-                    all the tiles along the way.'''
-                while True:
-                    x-= x_direction
-                    y-= y_direction
-                    if x == x_start and y == y_start:
-                        break
-                    tiles_to_flip.append([x, y])
-
-    if len(tiles_to_flip) == 0:  # If no tiles were flipped, this is not a valid move.
+    if tiles_to_flip == 0:  # If no tiles were flipped, this is not a valid move.
         return False
-    return tiles_to_flip
+    return bitsToSpaces(tiles_to_flip)
 
 def isOnBoard(x, y):
     # Return True if the coordinates are located on the board.
     return x >= 0 and x <= WIDTH -1 and y >= 0 and y <= HEIGHT -1
 
+# Bitboard engine: each color is an integer with one bit per space. Space x, y
+# is bit x * HEIGHT + y, so walking the bits from lowest to highest visits the
+# spaces in the same column-by-column order getValidMoves has always used.
+# Python integers grow as needed, so this works for every board size; the
+# tables below are built for the current size by setBoardSize().
+X_BITS_TABLE = str.maketrans('XO .', '1000')
+O_BITS_TABLE = str.maketrans('XO .', '0100')
+
+def getDirectionShifts():
+    '''Return a list of (shift, mask) pairs, one for each of the 8 directions.
+    Shifting a bitboard left by a positive shift (or right by a negative one)
+    moves every disc one step in that direction; ANDing with the mask drops
+    the discs that wrapped around into the next column or fell off the board.'''
+    top_row = 0
+    bottom_row = 0
+    for x in range(WIDTH):
+        top_row |= 1 << (x * HEIGHT)
+        bottom_row |= 1 << (x * HEIGHT + HEIGHT - 1)
+
+    shifts = []
+    for x_direction, y_direction in [[0, 1], [1, 1], [1, 0], [1, -1],
+                                     [0, -1], [-1, -1], [-1, 0], [-1, 1]]:
+        mask = FULL_MASK
+        if y_direction == 1:
+            mask &= ~top_row
+        elif y_direction == -1:
+            mask &= ~bottom_row
+        shifts.append((x_direction * HEIGHT + y_direction, mask))
+    return shifts
+
+def getRayMasks():
+    '''Return a list with an entry for each bit index: a list of (ray,
+    increasing) pairs, one per direction that doesn't leave the board at once.
+    ray has a bit for every space from that one to the edge of the board in
+    that direction, and increasing says if the bit indexes grow along it.'''
+    ray_masks = []
+    for x_start in range(WIDTH):
+        for y_start in range(HEIGHT):
+            rays = []
+            for x_direction, y_direction in [[0, 1], [1, 1], [1, 0], [1, -1],
+                                             [0, -1], [-1, -1], [-1, 0], [-1, 1]]:
+                ray = 0
+                x, y = x_start + x_direction, y_start + y_direction
+                while isOnBoard(x, y):
+                    ray |= 1 << (x * HEIGHT + y)
+                    x += x_direction
+                    y += y_direction
+                if ray:
+                    rays.append((ray, x_direction * HEIGHT + y_direction > 0))
+            ray_masks.append(rays)
+    return ray_masks
+
+def boardToBitboards(board):
+    # Convert a board from getNewBoard() into an (x_bits, o_bits) pair of integers.
+    cells = ''.join([''.join(column) for column in board])[::-1]
+    return int(cells.translate(X_BITS_TABLE), 2), int(cells.translate(O_BITS_TABLE), 2)
+
+def bitboardsToBoard(x_bits, o_bits):
+    # Convert an (x_bits, o_bits) pair back into a getNewBoard() style board.
+    board = getNewBoard()
+    for x, y in bitsToSpaces(x_bits):
+        board[x][y] = 'X'
+    for x, y in bitsToSpaces(o_bits):
+        board[x][y] = 'O'
+    return board
+
+def getTileBitboards(board, tile):
+    # Return the (own, opponent) bitboards from the point of view of tile.
+    x_bits, o_bits = boardToBitboards(board)
+    if tile == 'X':
+        return x_bits, o_bits
+    return o_bits, x_bits
+
+def bitsToSpaces(bits):
+    # Return a list of [x, y] lists, one for each set bit, lowest bit first.
+    spaces = []
+    while bits:
+        low_bit = bits & -bits
+        index = low_bit.bit_length() - 1
+        spaces.append([index // HEIGHT, index % HEIGHT])
+        bits ^= low_bit
+    return spaces
+
+def countBits(bits):
+    # Return the number of discs on a bitboard.
+    return bin(bits).count('1')
+
+def getValidMovesBits(own, opp):
+    # Return a bitboard of every empty space where own can move.
+    empty = ~(own | opp) & FULL_MASK
+    moves = 0
+    for shift, mask in DIRECTION_SHIFTS:
+        # Follow each run of opponent discs that starts next to one of our
+        # discs; the empty space just past the end of a run is a valid move.
+        if shift > 0:
+            run = (own << shift) & mask & opp
+            while run:
+                run = (run << shift) & mask
+                moves |= run & empty
+                run &= opp
+        else:
+            run = (own >> -shift) & mask & opp
+            while run:
+                run = (run >> -shift) & mask
+                moves |= run & empty
+                run &= opp
+    return moves
+
+def getFlipsBits(own, opp, move):
+    # Return a bitboard of the opponent discs that playing the move bit would flip.
+    flips = 0
+    for ray, increasing in RAY_MASKS[move.bit_length() - 1]:
+        # Find our disc nearest the move along the ray. The spaces between
+        # it and the move flip if they are all opponent discs.
+        own_on_ray = ray & own
+        if own_on_ray == 0:
+            continue
+        if increasing:
+            between = ray & ((own_on_ray & -own_on_ray) - 1)
+        else:
+            between = ray >> own_on_ray.bit_length() << own_on_ray.bit_length()
+        if between and (between & opp) == between:
+            flips |= between
+    return flips
+
 def getBoardWithValidMoves(board, tile):
     # Return a new board with periods marking the valid moves the player can make.
     board_copy = getBoardCopy(board)
@@ -73,25 +231,25 @@ def getBoardWithValidMoves(board, tile):
 
 def getValidMoves(board, tile):
     # Returns a list of [x,y] lists of valid moves for the given player on the given board.
-    valid_moves = []
-    for x in range(WIDTH):
-        for y in range(HEIGHT):
-            if isValidMove(board, tile, x, y) != False:
-                valid_moves.append([x, y])
-    return valid_moves
+    own, opp = getTileBitboards(board, tile)
+    return bitsToSpaces(getValidMovesBits(own, opp))
 
 def getScoreOfBoard(board):
     '''Determine the score by counting the tiles.
     Return a dictionary with keys 'X' and 'O'.'''
-    x_score = 0
-    o_score = 0
-    for x in range(WIDTH):
-        for y in range(HEIGHT):
-            if board[x][y] == 'X':
-                x_score += 1
-            if board[x][y] == 'O':
-                o_score += 1
-    return {'X': x_score, 'O': o_score}
+    x_bits, o_bits = boardToBitboards(board)
+    return {'X': countBits(x_bits), 'O': countBits(o_bits)}
+
+def getStartingBoard():
+    # Return a new board with the four starting pieces in the center.
+    board = getNewBoard()
+    x = WIDTH // 2
+    y = HEIGHT // 2
+    board[x - 1][y - 1] = 'X'
+    board[x - 1][y] = 'O'
+    board[x][y - 1] = 'O'
+    board[x][y] = 'X'
+    return board
 
 def enterPlayerTile():
     '''Let the player enter which tile they want to be.
@@ -144,8 +302,10 @@ def isOnCorner(x, y):
 
 def getPlayerMove(board, player_tile):
     ''' Let the player enter their move.
-    Return the move as [x, y], or return the strings 'hints' or 'quit'.'''
-    DIGITS1TO8 = '1 2 3 4 5 6 7 8'.split()
+    Return the move as [x, y], or return the strings 'hints' or 'quit'.
+    On boards up to 9 wide and tall the column and row can be typed
+    together (like 81); otherwise they need a space or comma between them.'''
+    separator = '' if WIDTH <= 9 and HEIGHT <= 9 else ' '
 
     while True:
         print('Enter your move, "quit" to end the game, or "hints" to toggle hints.')
@@ -153,23 +313,64 @@ def getPlayerMove(board, player_tile):
         if move == 'quit' or move == 'hints':
             return move
 
-        if len(move) == 2 and move[0] in DIGITS1TO8 and move[1] in DIGITS1TO8:
-            x = int(move[0]) - 1
-            y = int(move[1]) - 1
+        numbers = move.replace(',', ' ').split()
+        if separator == '' and len(move) == 2:
+            numbers = [move[0], move[1]]
+        if len(numbers) == 2 and numbers[0].isdecimal() and numbers[1].isdecimal() and \
+           isOnBoard(int(numbers[0]) - 1, int(numbers[1]) - 1):
+            x = int(numbers[0]) - 1
+            y = int(numbers[1]) - 1
             if isValidMove(board, player_tile, x, y) == False:
                 continue
             else:
                 break
         else:
-            print('That is not a valid move. Enter the column (1-8) and then the row(1-8).')
-            print('For example, 81 will move on the top-right corner.')
+            print(f'That is not a valid move. Enter the column (1-{WIDTH}) and then the row (1-{HEIGHT}).')
+            print(f'For example, {WIDTH}{separator}1 will move on the top-right corner.')
     return [x, y]
 
-def getComputerMove(board, computer_tile):
+def getComputerMove(board, computer_tile, search_depth=0, max_nodes=None, rng=random, table=None,
+                    endgame_empties=ENDGAME_EMPTIES, use_book=True, time_limit=None, workers=1,
+                    endgame_max_nodes=None):
     ''' Given a board and the computer's tile, determine where to
-    move and return that move as an [x,y] list.'''
+    move and return that move as an [x,y] list.
+    With a search_depth above 0, run an alpha-beta search up to that many
+    moves ahead, stopping early once max_nodes positions have been searched
+    or time_limit seconds have passed. With more than 1 worker, the search
+    is split across that many processes (see ParallelSearch).
+    rng is used to break ties, and table replaces TRANSPOSITION_TABLE.
+    If use_book is True and the position is in the opening book, play the
+    book move. Once endgame_empties or fewer spaces are empty, play the move
+    the endgame solver finds, unless it runs out of time. If endgame_max_nodes
+    is given, the solver gets that many positions instead of a time limit, so
+    whether it finishes doesn't depend on how fast the machine is.'''
+    book = getOpeningBook() if use_book else None
+    if book is not None:
+        book_entry = book.lookup(board, computer_tile)
+        if book_entry is not None:
+            return book_entry[0]
+
+    scores = getScoreOfBoard(board)
+    if WIDTH * HEIGHT - scores['X'] - scores['O'] <= endgame_empties:
+        if endgame_max_nodes is not None:
+            solver = EndgameSolver(max_nodes=endgame_max_nodes)
+        else:
+            solver = EndgameSolver(ENDGAME_TIME_LIMIT if time_limit is None else min(ENDGAME_TIME_LIMIT, time_limit))
+        try:
+            return solver.solve(board, computer_tile)[0]
+        except SearchAborted:
+            pass
+
+    if search_depth > 0 and workers > 1:
+        return getParallelSearch(workers).getBestMove(board, computer_tile, search_depth, max_nodes, time_limit)[0]
+    if search_depth > 0:
+        if table is None:
+            table = TRANSPOSITION_TABLE
+        search = AlphaBetaSearch(table, max_nodes, time_limit)
+        return search.getBestMove(board, computer_tile, search_depth)[0]
+
     possible_moves = getValidMoves(board, computer_tile)
-    random.shuffle(possible_moves)  # Randomize the order of the moves.
+    rng.shuffle(possible_moves)  # Randomize the order of the moves.
 
     # Always go for the corner if available.
     for x, y in possible_moves:
@@ -185,23 +386,753 @@ def getComputerMove(board, computer_tile):
         if score > best_score:
             best_move = [x, y]
             best_score = score
-        return best_move
+    return best_move
+
+# Alpha-beta search. Positions are scored from the point of view of the side
+# to move (negamax), and every search shares TRANSPOSITION_TABLE so the work
+# done while choosing one move is reused when choosing the next.
+MOBILITY_WEIGHT = 5  # Score for each extra move the side to move has.
+FINAL_DISC_SCORE = 10000  # Score for each disc of lead once the game is over.
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+TABLE_SIZE_BITS = 18  # The transposition table holds 2**18 positions.
+
+def getSquareWeights():
+    '''Return SQUARE_WEIGHTS[x][y], how good it is to hold each space.
+    Corners are best, and the spaces that give the opponent a way into a
+    corner are worst. On an 8x8 board this is:
+        100 -20  10   5   5  10 -20 100
+        -20 -50  -2  -2  -2  -2 -50 -20
+         10  -2  -1  -1  -1  -1  -2  10
+          5  -2  -1  -1  -1  -1  -2   5
+    and the same again upside down.'''
+    weights = []
+    for x in range(WIDTH):
+        column = []
+        for y in range(HEIGHT):
+            x_from_edge = min(x, WIDTH - 1 - x)
+            y_from_edge = min(y, HEIGHT - 1 - y)
+            if x_from_edge == 0 and y_from_edge == 0:
+                weight = 100  # Corner.
+            elif x_from_edge == 1 and y_from_edge == 1:
+                weight = -50  # Diagonally next to a corner.
+            elif min(x_from_edge, y_from_edge) == 0 and max(x_from_edge, y_from_edge) == 1:
+                weight = -20  # On an edge, next to a corner.
+            elif min(x_from_edge, y_from_edge) == 0 and max(x_from_edge, y_from_edge) == 2:
+                weight = 10
+            elif min(x_from_edge, y_from_edge) == 0:
+                weight = 5  # Any other edge space.
+            elif min(x_from_edge, y_from_edge) == 1:
+                weight = -2  # Next to an edge.
+            else:
+                weight = -1
+            column.append(weight)
+        weights.append(column)
+    return weights
+
+def getWeightMasks():
+    # Group the spaces by SQUARE_WEIGHTS into (weight, mask) pairs, best squares first.
+    masks = {}
+    for x in range(WIDTH):
+        for y in range(HEIGHT):
+            weight = SQUARE_WEIGHTS[x][y]
+            masks[weight] = masks.get(weight, 0) | (1 << (x * HEIGHT + y))
+    return sorted(masks.items(), reverse=True)
+
+# Zobrist hashing: a position's key is the XOR of one random number per disc,
+# plus ZOBRIST_O_TO_MOVE when it is O's turn. The generator has a fixed seed
+# so keys are the same in every process.
+def getZobristKeys():
+    '''Return (ZOBRIST_KEYS, ZOBRIST_FLIP_KEYS, ZOBRIST_O_TO_MOVE). The flip
+    key of a space is its X key XORed with its O key.'''
+    zobrist_random = random.Random(20151)
+    keys = {'X': [zobrist_random.getrandbits(64) for i in range(WIDTH * HEIGHT)],
+            'O': [zobrist_random.getrandbits(64) for i in range(WIDTH * HEIGHT)]}
+    flip_keys = [x_key ^ o_key for x_key, o_key in zip(keys['X'], keys['O'])]
+    return keys, flip_keys, zobrist_random.getrandbits(64)
+
+def getZobristKey(x_bits, o_bits, tile):
+    # Return the Zobrist key of a position with tile to move.
+    key = ZOBRIST_O_TO_MOVE if tile == 'O' else 0
+    for x, y in bitsToSpaces(x_bits):
+        key ^= ZOBRIST_KEYS['X'][x * HEIGHT + y]
+    for x, y in bitsToSpaces(o_bits):
+        key ^= ZOBRIST_KEYS['O'][x * HEIGHT + y]
+    return key
+
+class GameState:
+    '''A position that is changed in place. makeMove() records the move and
+    the discs it flipped on an undo stack so undoMove() can put them back,
+    and the disc counts, the list of empty spaces and the Zobrist key are
+    kept up to date as moves are made and undone, so exploring a position
+    never allocates a new board.
+    own and opp are the bitboards of the side to move (tile) and its opponent;
+    empties holds the bit index of every empty space.'''
+    def __init__(self, board, tile):
+        x_bits, o_bits = boardToBitboards(board)
+        self.tile = tile
+        self.other_tile = 'O' if tile == 'X' else 'X'
+        self.own, self.opp = (x_bits, o_bits) if tile == 'X' else (o_bits, x_bits)
+        self.scores = {'X': countBits(x_bits), 'O': countBits(o_bits)}
+        self.key = getZobristKey(x_bits, o_bits, tile)
+        self.empties = []
+        self.empty_positions = [None] * (WIDTH * HEIGHT)
+        for index in range(WIDTH * HEIGHT):
+            if not (x_bits | o_bits) >> index & 1:
+                self.empty_positions[index] = len(self.empties)
+                self.empties.append(index)
+        self.history = []  # The undo stack of (move_bit, flipped_bits) tuples.
+
+    def getValidMovesBits(self):
+        # Return a bitboard of the valid moves for the side to move.
+        return getValidMovesBits(self.own, self.opp)
+
+    def getBoard(self):
+        # Return the position as a getNewBoard() style board.
+        if self.tile == 'X':
+            return bitboardsToBoard(self.own, self.opp)
+        return bitboardsToBoard(self.opp, self.own)
+
+    def isGameOver(self):
+        return getValidMovesBits(self.own, self.opp) == 0 and getValidMovesBits(self.opp, self.own) == 0
+
+    def makeMove(self, move):
+        '''Place a disc for the side to move on the move bit, flip the
+        opponent's discs and hand the turn over.
+        Return False if this is an invalid move; True if it is valid.'''
+        if move & (self.own | self.opp):
+            return False
+        flips = getFlipsBits(self.own, self.opp, move)
+        if flips == 0:
+            return False
+
+        index = move.bit_length() - 1
+        key = self.key ^ ZOBRIST_O_TO_MOVE ^ ZOBRIST_KEYS[self.tile][index]
+        flipped = flips
+        while flipped:
+            low_bit = flipped & -flipped
+            key ^= ZOBRIST_FLIP_KEYS[low_bit.bit_length() - 1]
+            flipped ^= low_bit
+        self.key = key
+
+        flip_count = countBits(flips)
+        self.scores[self.tile] += flip_count + 1
+        self.scores[self.other_tile] -= flip_count
+
+        # Swap the last empty space into this one's place in the list.
+        position = self.empty_positions[index]
+        last = self.empties.pop()
+        if last != index:
+            self.empties[position] = last
+            self.empty_positions[last] = position
+
+        self.own, self.opp = self.opp ^ flips, self.own | move | flips
+        self.tile, self.other_tile = self.other_tile, self.tile
+        self.history.append((move, flips))
+        return True
+
+    def passTurn(self):
+        # Hand the turn to the opponent without moving.
+        self.key ^= ZOBRIST_O_TO_MOVE
+        self.own, self.opp = self.opp, self.own
+        self.tile, self.other_tile = self.other_tile, self.tile
+        self.history.append((0, 0))
+
+    def undoMove(self):
+        # Take back the last makeMove() or passTurn().
+        move, flips = self.history.pop()
+        self.own, self.opp = self.opp, self.own
+        self.tile, self.other_tile = self.other_tile, self.tile
+        self.key ^= ZOBRIST_O_TO_MOVE
+        if move == 0:
+            return
+
+        self.own ^= move | flips
+        self.opp |= flips
+        index = move.bit_length() - 1
+        self.key ^= ZOBRIST_KEYS[self.tile][index]
+        flipped = flips
+        while flipped:
+            low_bit = flipped & -flipped
+            self.key ^= ZOBRIST_FLIP_KEYS[low_bit.bit_length() - 1]
+            flipped ^= low_bit
+
+        flip_count = countBits(flips)
+        self.scores[self.tile] -= flip_count + 1
+        self.scores[self.other_tile] += flip_count
+
+        # Reverse the swap makeMove() did on the empties list.
+        position = self.empty_positions[index]
+        if position == len(self.empties):
+            self.empties.append(index)
+        else:
+            last = self.empties[position]
+            self.empty_positions[last] = len(self.empties)
+            self.empties.append(last)
+            self.empties[position] = index
+
+def evaluateBits(own, opp, own_moves):
+    # Score a position for the side to move by square weights and mobility.
+    score = MOBILITY_WEIGHT * (countBits(own_moves) - countBits(getValidMovesBits(opp, own)))
+    for weight, mask in WEIGHT_MASKS:
+        score += weight * (countBits(own & mask) - countBits(opp & mask))
+    return score
+
+class TranspositionTable:
+    '''A fixed-size table of search results indexed by the low bits of the
+    Zobrist key. A new result replaces whatever shared its slot unless that
+    is the same position searched deeper, so memory use never grows.'''
+    def __init__(self, size_bits=TABLE_SIZE_BITS):
+        self.mask = (1 << size_bits) - 1
+        self.entries = [None] * (1 << size_bits)
+
+    def lookup(self, key):
+        # Return (depth, score, flag, move_bit) for this key, or None.
+        entry = self.entries[key & self.mask]
+        if entry is None or entry[0] != key:
+            return None
+        return entry[1:]
+
+    def store(self, key, depth, score, flag, move):
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is None or entry[0] != key or entry[1] <= depth:
+            self.entries[index] = (key, depth, score, flag, move)
+
+    def clear(self):
+        self.entries = [None] * (self.mask + 1)
+
+class SearchAborted(Exception):
+    # Raised inside a search once it has used up its node budget or time, or was stopped.
+    pass
+
+TIME_USE_FRACTION = 0.5  # Don't start a deeper search after this much of the time limit.
+
+class AlphaBetaSearch:
+    '''Iterative-deepening negamax search with alpha-beta pruning.
+    Each search object counts its own nodes; the table can be shared.
+    The search stops at the last finished depth once it has searched
+    max_nodes positions, used time_limit seconds, or stop_event is set.'''
+    def __init__(self, table, max_nodes=None, time_limit=None, stop_event=None):
+        self.table = table
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.stop_event = stop_event
+        self.start_time = None
+        self.deadline = None
+        self.nodes = 0
+
+    def getBestMove(self, board, tile, max_depth):
+        '''Search the board for tile one depth at a time up to max_depth.
+        Return [[x, y], score, depth] for the deepest search that finished.'''
+        self.start_time = time.perf_counter()
+        if self.time_limit is not None:
+            self.deadline = self.start_time + self.time_limit
+        state = GameState(board, tile)
+        best_move = self.orderMoves(state.getValidMovesBits(), 0)[0]
+        best_score = None
+        depth_done = 0
+        for depth in range(1, max_depth + 1):
+            if depth > 1 and self.deadline is not None and \
+               time.perf_counter() - self.start_time > TIME_USE_FRACTION * self.time_limit:
+                break  # The next depth would most likely not finish in time.
+            try:
+                best_score, best_move = self.searchRoot(state, depth, best_move)
+            except SearchAborted:
+                break
+            depth_done = depth
+        index = best_move.bit_length() - 1
+        return [[index // HEIGHT, index % HEIGHT], best_score, depth_done]
+
+    def searchRoot(self, state, depth, first_move):
+        # Search every root move, trying first_move (the previous best) first.
+        key = state.key
+        alpha = -INFINITY
+        best_move = first_move
+        history_length = len(state.history)
+        try:
+            for move in self.orderMoves(state.getValidMovesBits(), first_move):
+                state.makeMove(move)
+                score = -self.negamax(state, depth - 1, -INFINITY, -alpha)
+                state.undoMove()
+                if score > alpha:
+                    alpha = score
+                    best_move = move
+        except SearchAborted:
+            # Unwind the moves the interrupted search left on the state.
+            while len(state.history) > history_length:
+                state.undoMove()
+            raise
+        self.table.store(key, depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def negamax(self, state, depth, alpha, beta):
+        # Return the score of the position for the side to move.
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchAborted()
+        if self.nodes & 255 == 0:
+            if self.deadline is not None and time.perf_counter() > self.deadline:
+                raise SearchAborted()
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise SearchAborted()
+
+        moves = state.getValidMovesBits()
+        if moves == 0:
+            if getValidMovesBits(state.opp, state.own) == 0:
+                # Neither side can move, so the game is over.
+                return (state.scores[state.tile] - state.scores[state.other_tile]) * FINAL_DISC_SCORE
+            state.passTurn()
+            score = -self.negamax(state, depth, -beta, -alpha)
+            state.undoMove()
+            return score
+        if depth <= 0:
+            return evaluateBits(state.own, state.opp, moves)
+
+        key = state.key
+        table_move = 0
+        entry = self.table.lookup(key)
+        if entry is not None:
+            entry_depth, entry_score, entry_flag, table_move = entry
+            if entry_depth >= depth:
+                if entry_flag == EXACT:
+                    return entry_score
+                if entry_flag == LOWER_BOUND and entry_score >= beta:
+                    return entry_score
+                if entry_flag == UPPER_BOUND and entry_score <= alpha:
+                    return entry_score
+
+        alpha_start = alpha
+        best_score = -INFINITY
+        best_move = 0
+        for move in self.orderMoves(moves, table_move):
+            state.makeMove(move)
+            score = -self.negamax(state, depth - 1, -beta, -alpha)
+            state.undoMove()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best_score <= alpha_start:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.table.store(key, depth, best_score, flag, best_move)
+        return best_score
+
+    def orderMoves(self, moves, first_move):
+        # Return the move bits as a list: first_move, then by square weight.
+        ordered = []
+        if moves & first_move:
+            ordered.append(first_move)
+            moves ^= first_move
+        for weight, mask in WEIGHT_MASKS:
+            group = moves & mask
+            while group:
+                low_bit = group & -group
+                ordered.append(low_bit)
+                group ^= low_bit
+        return ordered
+
+# Endgame solver. Near the end of the game the exact final result can be
+# searched for: scores are final disc differences, and the search looks at
+# every move to the end of the game instead of stopping at a depth.
+FASTEST_FIRST_EMPTIES = 7  # Above this many empties, order moves fastest-first.
+FEW_EMPTIES = 4  # At this many empties or fewer, try the empty spaces directly.
+
+def getParityRegionMasks():
+    # Return a mask for each quarter of the board.
+    masks = []
+    for left, right in [(0, WIDTH // 2), (WIDTH // 2, WIDTH)]:
+        for top, bottom in [(0, HEIGHT // 2), (HEIGHT // 2, HEIGHT)]:
+            mask = 0
+            for x in range(left, right):
+                for y in range(top, bottom):
+                    mask |= 1 << (x * HEIGHT + y)
+            masks.append(mask)
+    return masks
+
+class EndgameSolver:
+    '''Perfect-play search to the end of the game. Raises SearchAborted
+    once time_limit seconds or max_nodes positions have been used up.'''
+    def __init__(self, time_limit=None, max_nodes=None):
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.deadline = None
+        self.nodes = 0
+
+    def solve(self, board, tile):
+        '''Return [[x, y], disc_difference]: the best move for tile and the
+        final disc lead (tile's discs minus the opponent's) with perfect play.
+        The move is None if tile has no valid move.'''
+        if self.time_limit is not None:
+            self.deadline = time.perf_counter() + self.time_limit
+        state = GameState(board, tile)
+        moves = state.getValidMovesBits()
+        if moves == 0:
+            return [None, self.solveState(state, -INFINITY, INFINITY)]
+
+        best_score = -INFINITY
+        best_move = 0
+        for move in self.orderMoves(state, moves):
+            state.makeMove(move)
+            try:
+                score = -self.solveState(state, -INFINITY, -best_score)
+            finally:
+                state.undoMove()
+            if score > best_score:
+                best_score = score
+                best_move = move
+        index = best_move.bit_length() - 1
+        return [[index // HEIGHT, index % HEIGHT], best_score]
+
+    def countNode(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchAborted()
+        if self.deadline is not None and self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+            raise SearchAborted()
+
+    def solveState(self, state, alpha, beta):
+        # Return the final disc lead of the side to move in the GameState.
+        if len(state.empties) <= FEW_EMPTIES:
+            return self.solveFewEmpties(state.own, state.opp, list(state.empties), alpha, beta)
+        self.countNode()
+
+        moves = state.getValidMovesBits()
+        if moves == 0:
+            if getValidMovesBits(state.opp, state.own) == 0:
+                return state.scores[state.tile] - state.scores[state.other_tile]
+            state.passTurn()
+            try:
+                return -self.solveState(state, -beta, -alpha)
+            finally:
+                state.undoMove()
+
+        best_score = -INFINITY
+        for move in self.orderMoves(state, moves):
+            state.makeMove(move)
+            try:
+                score = -self.solveState(state, -beta, -alpha)
+            finally:
+                state.undoMove()
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def orderMoves(self, state, moves):
+        '''Return the move bits in the order to search them. Moves into a
+        quarter of the board with an odd number of empty spaces come first
+        (so we get the last move there), and with many empties left, moves
+        that leave the opponent the fewest replies come before those.'''
+        empty = ~(state.own | state.opp) & FULL_MASK
+        odd_regions = 0
+        for mask in PARITY_REGION_MASKS:
+            if countBits(empty & mask) & 1:
+                odd_regions |= mask
+
+        keyed_moves = []
+        fastest_first = len(state.empties) > FASTEST_FIRST_EMPTIES
+        while moves:
+            move = moves & -moves
+            moves ^= move
+            replies = 0
+            if fastest_first:
+                flips = getFlipsBits(state.own, state.opp, move)
+                replies = countBits(getValidMovesBits(state.opp ^ flips, state.own | move | flips))
+            keyed_moves.append((replies, 0 if move & odd_regions else 1, move))
+        keyed_moves.sort()
+        return [move for replies, parity, move in keyed_moves]
+
+    def solveFewEmpties(self, own, opp, empties, alpha, beta):
+        '''Solve a position with only a few empty spaces, given as a list of
+        bit indices, by trying each one directly instead of generating moves.'''
+        self.countNode()
+        if len(empties) == 1:
+            return self.solveLastEmpty(own, opp, empties[0])
+
+        best_score = -INFINITY
+        for i, index in enumerate(empties):
+            move = 1 << index
+            flips = getFlipsBits(own, opp, move)
+            if flips == 0:
+                continue
+            score = -self.solveFewEmpties(opp ^ flips, own | move | flips,
+                                          empties[:i] + empties[i + 1:], -beta, -alpha)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        if best_score != -INFINITY:
+            return best_score
+
+        # We have to pass. If the opponent can't move either, the game is over.
+        for index in empties:
+            if getFlipsBits(opp, own, 1 << index):
+                return -self.solveFewEmpties(opp, own, empties, -beta, -alpha)
+        return countBits(own) - countBits(opp)
+
+    def solveLastEmpty(self, own, opp, index):
+        # Return the final disc lead of own when only the space at index is empty.
+        move = 1 << index
+        own_count = countBits(own)
+        opp_count = countBits(opp)
+        flips = countBits(getFlipsBits(own, opp, move))
+        if flips:
+            return own_count + flips + 1 - (opp_count - flips)
+        flips = countBits(getFlipsBits(opp, own, move))
+        if flips:
+            return own_count - flips - (opp_count + flips + 1)
+        return own_count - opp_count
+
+TRANSPOSITION_TABLE = TranspositionTable()
+
+class Ponderer:
+    '''Thinks about the computer's next move in a background thread while
+    the player decides on theirs. Every reply the player could make is
+    searched one depth at a time, best squares first, and the results go
+    into the transposition table, where the computer's real search finds
+    them once the player's move arrives.'''
+    def __init__(self, table=None, max_depth=PONDER_MAX_DEPTH):
+        self.table = TRANSPOSITION_TABLE if table is None else table
+        self.max_depth = max_depth
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self, board, player_tile):
+        # Start pondering the board, on which it is the player's turn.
+        self.stop()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.ponder, args=(getBoardCopy(board), player_tile), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        # Stop pondering and wait for the background thread to finish.
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+
+    def ponder(self, board, player_tile):
+        computer_tile = 'O' if player_tile == 'X' else 'X'
+        replies = getValidMoves(board, player_tile)
+        replies.sort(key=lambda move: SQUARE_WEIGHTS[move[0]][move[1]], reverse=True)
+        reply_boards = []
+        for x, y in replies:
+            reply_board = getBoardCopy(board)
+            makeMove(reply_board, player_tile, x, y)
+            if getValidMoves(reply_board, computer_tile) != []:
+                reply_boards.append(reply_board)
+
+        for depth in range(1, self.max_depth + 1):
+            for reply_board in reply_boards:
+                search = AlphaBetaSearch(self.table, stop_event=self.stop_event)
+                search.getBestMove(reply_board, computer_tile, depth)
+                if self.stop_event.is_set():
+                    return
+
+# Opening book. Positions from the first few moves are searched ahead of time
+# and their best replies written to a file laid out as an open-addressing hash
+# table: a BOOK_HEADER, then slot_count BOOK_ENTRY slots of (own bits, opponent
+# bits, move index, score), with all-zero bitboards marking an empty slot. The
+# file is read through mmap, so lookups never load it into memory and every
+# process using it shares the same pages.
+# Positions are stored in their canonical form: the smallest of the
+# rotations and reflections of the board, from the side to move's view.
+# Bitboards take as many bytes as the board size needs, so entries are
+# getBookEntrySize() bytes long.
+BOOK_MAGIC = b'RVGBOOK1'
+BOOK_HEADER = struct.Struct('<8sIIBBBx')  # Magic, slot count, entry count, depth, width, height.
+BOOK_MOVE = struct.Struct('<Bi')  # Move index and score, after the two bitboards.
+BOOK_DEPTH = 6  # Book positions are the ones reached in fewer than this many moves.
+BOOK_SEARCH_DEPTH = 6  # How deep the best reply to each book position is searched.
+OPENING_BOOK = None  # The opened OpeningBook, once getOpeningBook() finds one.
+
+def getSymmetryMaps():
+    '''Return lists mapping each bit index to its index after one of the
+    rotations or reflections of the board, the identity first. A square
+    board has 8 of these, and any other board 4.'''
+    last_x = WIDTH - 1
+    last_y = HEIGHT - 1
+    transforms = [lambda x, y: (x, y), lambda x, y: (last_x - x, y),
+                  lambda x, y: (x, last_y - y), lambda x, y: (last_x - x, last_y - y)]
+    if WIDTH == HEIGHT:
+        transforms += [lambda x, y: (y, x), lambda x, y: (last_y - y, x),
+                       lambda x, y: (y, last_x - x), lambda x, y: (last_y - y, last_x - x)]
+    maps = []
+    for transform in transforms:
+        index_map = [0] * (WIDTH * HEIGHT)
+        for x in range(WIDTH):
+            for y in range(HEIGHT):
+                new_x, new_y = transform(x, y)
+                index_map[x * HEIGHT + y] = new_x * HEIGHT + new_y
+        maps.append(index_map)
+    return maps
+
+def transformBits(bits, index_map):
+    # Move every bit of a bitboard to its place in index_map.
+    transformed = 0
+    while bits:
+        low_bit = bits & -bits
+        transformed |= 1 << index_map[low_bit.bit_length() - 1]
+        bits ^= low_bit
+    return transformed
+
+def getCanonicalPosition(own, opp):
+    '''Return (symmetry, own, opp) for the smallest of the symmetric forms
+    of the position, where symmetry is the index of the map that made it.'''
+    best = None
+    for symmetry, index_map in enumerate(SYMMETRY_MAPS):
+        candidate = (transformBits(own, index_map), transformBits(opp, index_map), symmetry)
+        if best is None or candidate < best:
+            best = candidate
+    return best[2], best[0], best[1]
+
+def getBookEntrySize():
+    # Return the size in bytes of a book entry for the current board size.
+    return 2 * ((WIDTH * HEIGHT + 7) // 8) + BOOK_MOVE.size
+
+def readBookEntry(data, offset):
+    # Return the (own, opp, move index, score) book entry at offset in data.
+    board_bytes = (WIDTH * HEIGHT + 7) // 8
+    own = int.from_bytes(data[offset:offset + board_bytes], 'little')
+    opp = int.from_bytes(data[offset + board_bytes:offset + 2 * board_bytes], 'little')
+    return (own, opp) + BOOK_MOVE.unpack_from(data, offset + 2 * board_bytes)
+
+def writeBookEntry(data, offset, own, opp, move, score):
+    board_bytes = (WIDTH * HEIGHT + 7) // 8
+    data[offset:offset + 2 * board_bytes] = own.to_bytes(board_bytes, 'little') + opp.to_bytes(board_bytes, 'little')
+    BOOK_MOVE.pack_into(data, offset + 2 * board_bytes, move, score)
+
+class OpeningBook:
+    '''An opening book file written by writeOpeningBook(), opened through
+    mmap. lookup() only works while the board is the size the book is for.'''
+    def __init__(self, path):
+        with open(path, 'rb') as book_file:
+            self.data = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.slot_count, self.entry_count, self.depth, self.width, self.height = \
+            BOOK_HEADER.unpack_from(self.data, 0)
+        entry_size = 2 * ((self.width * self.height + 7) // 8) + BOOK_MOVE.size
+        if magic != BOOK_MAGIC or len(self.data) != BOOK_HEADER.size + self.slot_count * entry_size:
+            self.data.close()
+            raise ValueError(f'{path} is not a Reversegam opening book.')
+
+    def lookup(self, board, tile):
+        # Return [[x, y], score] for the book reply to the board, or None if it isn't in the book.
+        own, opp = getTileBitboards(board, tile)
+        symmetry, own, opp = getCanonicalPosition(own, opp)
+        slot = getZobristKey(own, opp, 'X') & (self.slot_count - 1)
+        while True:
+            entry_own, entry_opp, move, score = readBookEntry(self.data, BOOK_HEADER.size + slot * getBookEntrySize())
+            if entry_own == 0 and entry_opp == 0:
+                return None
+            if entry_own == own and entry_opp == opp:
+                index = INVERSE_SYMMETRY_MAPS[symmetry][move]
+                return [[index // HEIGHT, index % HEIGHT], score]
+            slot = (slot + 1) & (self.slot_count - 1)
+
+    def close(self):
+        self.data.close()
+
+def getOpeningBook():
+    '''Return the OpeningBook at OPENING_BOOK_PATH, or None if there is no
+    book file or it is for another board size.'''
+    global OPENING_BOOK
+    if OPENING_BOOK is None and os.path.exists(OPENING_BOOK_PATH):
+        OPENING_BOOK = OpeningBook(OPENING_BOOK_PATH)
+    if OPENING_BOOK is None or (OPENING_BOOK.width, OPENING_BOOK.height) != (WIDTH, HEIGHT):
+        return None
+    return OPENING_BOOK
+
+def getBookPositions(depth):
+    '''Return a list of the canonical (own, opp) positions reached in fewer
+    than depth moves from the starting position where the side to move has
+    a valid move.'''
+    own, opp = getTileBitboards(getStartingBoard(), 'X')
+    frontier = {getCanonicalPosition(own, opp)[1:]}
+    positions = []
+    for moves_played in range(depth):
+        next_frontier = set()
+        for own, opp in frontier:
+            moves = getValidMovesBits(own, opp)
+            if moves == 0:
+                continue
+            positions.append((own, opp))
+            while moves:
+                move = moves & -moves
+                moves ^= move
+                flips = getFlipsBits(own, opp, move)
+                next_frontier.add(getCanonicalPosition(opp ^ flips, own | move | flips)[1:])
+        frontier = next_frontier
+    return positions
+
+def searchBookPosition(position):
+    # Search a book position, given as (own, opp, search_depth). Return (own, opp, move index, score).
+    own, opp, search_depth = position
+    search = AlphaBetaSearch(TRANSPOSITION_TABLE)
+    (x, y), score, depth = search.getBestMove(bitboardsToBoard(own, opp), 'X', search_depth)
+    score = max(-2 ** 31, min(2 ** 31 - 1, score))
+    return own, opp, x * HEIGHT + y, score
+
+def writeOpeningBook(path, depth=BOOK_DEPTH, search_depth=BOOK_SEARCH_DEPTH, workers=None):
+    '''Search every book position up to depth across a pool of worker
+    processes and write the results to path. Return the number of entries.'''
+    positions = getBookPositions(depth)
+    slot_count = 1
+    while slot_count < 2 * len(positions):  # Keep the table at most half full.
+        slot_count *= 2
+
+    entry_size = getBookEntrySize()
+    data = bytearray(BOOK_HEADER.size + slot_count * entry_size)
+    BOOK_HEADER.pack_into(data, 0, BOOK_MAGIC, slot_count, len(positions), depth, WIDTH, HEIGHT)
+    tasks = [(own, opp, search_depth) for own, opp in positions]
+    with multiprocessing.Pool(workers, setBoardSize, (WIDTH, HEIGHT)) as pool:
+        for done, (own, opp, move, score) in enumerate(pool.imap_unordered(searchBookPosition, tasks, 16), 1):
+            slot = getZobristKey(own, opp, 'X') & (slot_count - 1)
+            while readBookEntry(data, BOOK_HEADER.size + slot * entry_size)[:2] != (0, 0):
+                slot = (slot + 1) & (slot_count - 1)
+            writeBookEntry(data, BOOK_HEADER.size + slot * entry_size, own, opp, move, score)
+            if done % 500 == 0 or done == len(positions):
+                print(f'{done}/{len(positions)} positions searched')
+
+    # Write to a temporary file first so readers never see a half-written book.
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as book_file:
+        book_file.write(data)
+    os.replace(temporary_path, path)
+    return len(positions)
+
+# Build the tables for the default board size.
+setBoardSize(WIDTH, HEIGHT)
 
 def printScore(board, player_tile, computer_tile):
     scores = getScoreOfBoard(board)
     print(f'You: {scores[player_tile]} pts. | Computer: {scores[computer_tile]} pts.')
 
-def playGame(player_tile, computer_tile):
+def playGame(player_tile, computer_tile, ponder=False, workers=1):
+    # If ponder is True, the computer thinks ahead while the player chooses a move.
+    # The computer searches with this many worker processes. Pondering only
+    # fills this process's TRANSPOSITION_TABLE, so it needs workers to be 1.
+    if ponder and workers > 1:
+        raise ValueError('pondering only helps a search with one worker')
     show_hints = False
+    ponderer = Ponderer() if ponder else None
     turn = whoGoesFirst()
     print(f'The {turn} will go first.')
 
     # Clear the board and place starting pieces.
-    board = getNewBoard()
-    board[3][3] = 'X'
-    board[3][4] = 'O'
-    board[4][3] = 'O'
-    board[4][4] = 'X'
+    board = getStartingBoard()
 
     while True:
         player_valid_moves = getValidMoves(board, player_tile)
@@ -219,7 +1150,11 @@ def playGame(player_tile, computer_tile):
                     drawBoard(board)
                 printScore(board, player_tile, computer_tile)
 
+                if ponderer is not None:
+                    ponderer.start(board, player_tile)
                 move = getPlayerMove(board, player_tile)
+                if ponderer is not None:
+                    ponderer.stop()
                 if move == 'quit':
                     print('Thanks for playing!')
                     sys.exit()  # Terminates the program.
@@ -236,29 +1171,724 @@ def playGame(player_tile, computer_tile):
                 printScore(board, player_tile, computer_tile)
 
                 input('Press Enter to see the computer\'s move.')
-                move = getComputerMove(board, computer_tile)
+                move = getComputerMove(board, computer_tile, COMPUTER_SEARCH_DEPTH, COMPUTER_MAX_NODES,
+                                       time_limit=COMPUTER_TIME_LIMIT, workers=workers)
                 makeMove(board, computer_tile, move[0], move[1])
             turn = 'player'
 
-# Start the game loop.
-print('Welcome to Reversegam!')
-player_tile, computer_tile = enterPlayerTile()
-while True:
-    final_board = playGame(player_tile, computer_tile)
-
-    # Display the final score.
-    drawBoard(final_board)
-    scores = getScoreOfBoard(final_board)
-    print('X scored %s points. O scored %s points.' % (scores['X'], scores['O']))
-    if scores[player_tile] > scores[computer_tile]:
-        print(f'You beat the computer by {scores[player_tile] - scores[computer_tile]} points! Congratulations!')
-    elif scores[player_tile] < scores[computer_tile]:
-        print(f'You lost :( The computer beat you by {scores[computer_tile] - scores[player_tile]}.')
-    else:
-        print('The game was a tie!')
+# Batch functions: these work on a whole NumPy array of positions at once.
+# A batch is an (N, WIDTH, HEIGHT) int8 array where positions[n][x][y] is
+# ARRAY_TILES[board[x][y]] for the n-th board.
+ARRAY_TILES = {' ': 0, 'X': 1, 'O': -1}
+
+def checkNumpy():
+    if np is None:
+        raise ImportError('The batch functions need NumPy. Install it with: pip install numpy')
+
+def boardsToArray(boards):
+    # Convert a list of getNewBoard() style boards into an (N, WIDTH, HEIGHT) int8 array.
+    checkNumpy()
+    positions = np.zeros((len(boards), WIDTH, HEIGHT), dtype=np.int8)
+    for n, board in enumerate(boards):
+        for x in range(WIDTH):
+            for y in range(HEIGHT):
+                positions[n, x, y] = ARRAY_TILES.get(board[x][y], 0)
+    return positions
 
-    print('Do you want to play again? (yes or no)')
-    if not input().lower().startswith('y'):
-        break
+def arrayToBoards(positions):
+    # Convert an (N, WIDTH, HEIGHT) array back into a list of boards.
+    symbols = {0: ' ', 1: 'X', -1: 'O'}
+    return [[[symbols[int(value)] for value in column] for column in position] for position in positions]
 
+def getTileValues(tiles, count):
+    # Turn 'X', 'O' or an array of N 1/-1 values into an (N, 1, 1) array of tile values.
+    if isinstance(tiles, str):
+        tiles = np.full(count, ARRAY_TILES[tiles], dtype=np.int8)
+    return np.asarray(tiles, dtype=np.int8).reshape(count, 1, 1)
+
+def shiftBatch(masks, x_direction, y_direction):
+    # Return masks moved so that result[n, x, y] is masks[n, x + x_direction, y + y_direction],
+    # and False where that space is off the board.
+    shifted = np.zeros_like(masks)
+    width, height = masks.shape[1], masks.shape[2]
+    shifted[:, max(0, -x_direction):min(width, width - x_direction),
+               max(0, -y_direction):min(height, height - y_direction)] = \
+        masks[:, max(0, x_direction):min(width, width + x_direction),
+                 max(0, y_direction):min(height, height + y_direction)]
+    return shifted
+
+def getValidMovesBatch(positions, tiles):
+    '''Return an (N, WIDTH, HEIGHT) bool array marking the valid moves in
+    every position. tiles is 'X', 'O' or an array of N 1/-1 tile values
+    saying whose move it is in each position.'''
+    checkNumpy()
+    positions = np.asarray(positions, dtype=np.int8)
+    tile_values = getTileValues(tiles, len(positions))
+    own = positions == tile_values
+    opp = positions == -tile_values
+    valid_moves = np.zeros(positions.shape, dtype=bool)
+    for x_direction, y_direction in [[0, 1], [1, 1], [1, 0], [1, -1],
+                                     [0, -1], [-1, -1], [-1, 0], [-1, 1]]:
+        # run marks the spaces with an unbroken line of opponent discs
+        # running from the next space in this direction up to the current step.
+        run = shiftBatch(opp, x_direction, y_direction)
+        step = 2
+        while run.any():
+            valid_moves |= run & shiftBatch(own, step * x_direction, step * y_direction)
+            run &= shiftBatch(opp, step * x_direction, step * y_direction)
+            step += 1
+    return valid_moves & (positions == 0)
+
+def getMobilityBatch(positions, tiles):
+    # Return an array of the number of valid moves in each position.
+    return getValidMovesBatch(positions, tiles).sum(axis=(1, 2))
+
+def getScoresBatch(positions):
+    # Return an (N, 2) array of the X and O disc counts of each position.
+    checkNumpy()
+    positions = np.asarray(positions, dtype=np.int8)
+    return np.stack([(positions == 1).sum(axis=(1, 2)), (positions == -1).sum(axis=(1, 2))], axis=1)
+
+def getFlipsBatch(positions, tiles, moves):
+    '''Return an (N, WIDTH, HEIGHT) bool array of the discs that moving on
+    moves[n] (an [x, y] pair per position) would flip in each position.
+    Positions where the move is invalid get no flips.'''
+    checkNumpy()
+    positions = np.asarray(positions, dtype=np.int8)
+    moves = np.asarray(moves).reshape(len(positions), 2)
+    tile_values = getTileValues(tiles, len(positions))
+    own = positions == tile_values
+    opp = positions == -tile_values
+    move_masks = np.zeros(positions.shape, dtype=bool)
+    move_masks[np.arange(len(positions)), moves[:, 0], moves[:, 1]] = True
+    move_masks &= positions == 0
+
+    flips = np.zeros(positions.shape, dtype=bool)
+    for x_direction, y_direction in [[0, 1], [1, 1], [1, 0], [1, -1],
+                                     [0, -1], [-1, -1], [-1, 0], [-1, 1]]:
+        # Walk away from each move, collecting opponent discs into line until
+        # one of our discs closes the line off.
+        line = np.zeros(positions.shape, dtype=bool)
+        step = shiftBatch(move_masks, -x_direction, -y_direction) & opp
+        while step.any():
+            line |= step
+            step = shiftBatch(step, -x_direction, -y_direction)
+            closed = (step & own).any(axis=(1, 2))
+            flips |= line & closed[:, None, None]
+            step &= opp
+    return flips
+
+def makeMovesBatch(positions, tiles, moves):
+    '''Return a copy of positions with moves[n] played in each position.
+    Positions where the move is invalid are left unchanged.'''
+    flips = getFlipsBatch(positions, tiles, moves)
+    tile_values = getTileValues(tiles, len(flips))
+    new_positions = np.array(positions, dtype=np.int8)
+    played = flips.any(axis=(1, 2))
+    moves = np.asarray(moves).reshape(len(flips), 2)
+    new_positions[played, moves[played, 0], moves[played, 1]] = tile_values[played, 0, 0]
+    return np.where(flips, tile_values, new_positions)
+
+# Perft: count every position reachable in exactly depth moves from the
+# starting position, counting a pass as a move and a finished game as a
+# position. The counts only depend on the move rules, so any change in them
+# means the move generator is broken. PERFT_RESULTS are for the 8x8 board.
+PERFT_RESULTS = {1: 4, 2: 12, 3: 56, 4: 244, 5: 1396, 6: 8200, 7: 55092,
+                 8: 390216, 9: 3005288, 10: 24571284, 11: 212258800,
+                 12: 1939886636, 13: 18429641748, 14: 184042084512}
+
+def perft(state, depth):
+    # Return the number of positions depth moves after the GameState.
+    if depth == 0:
+        return 1
+    moves = state.getValidMovesBits()
+    if moves == 0:
+        if getValidMovesBits(state.opp, state.own) == 0:
+            return 1  # The game is over, so this position is a leaf.
+        state.passTurn()
+        nodes = perft(state, depth - 1)
+        state.undoMove()
+        return nodes
+    if depth == 1:
+        return countBits(moves)
+
+    nodes = 0
+    while moves:
+        move = moves & -moves
+        moves ^= move
+        state.makeMove(move)
+        nodes += perft(state, depth - 1)
+        state.undoMove()
+    return nodes
+
+def perftBoard(board, tile, depth):
+    # Same as perft(), but through the getValidMoves()/makeMove() board functions.
+    if depth == 0:
+        return 1
+    other_tile = 'O' if tile == 'X' else 'X'
+    moves = getValidMoves(board, tile)
+    if moves == []:
+        if getValidMoves(board, other_tile) == []:
+            return 1
+        return perftBoard(board, other_tile, depth - 1)
+
+    nodes = 0
+    for x, y in moves:
+        board_copy = getBoardCopy(board)
+        makeMove(board_copy, tile, x, y)
+        nodes += perftBoard(board_copy, other_tile, depth - 1)
+    return nodes
+
+def runPerft(max_depth, engine='state', json_path=None):
+    '''Run perft for every depth up to max_depth from the starting position,
+    print the node counts and speed, and check them against PERFT_RESULTS.
+    If json_path is given, also write the results there as JSON.
+    Return True if every count with a known result was correct.'''
+    results = []
+    all_correct = True
+    for depth in range(1, max_depth + 1):
+        start_time = time.perf_counter()
+        if engine == 'board':
+            nodes = perftBoard(getStartingBoard(), 'X', depth)
+        else:
+            nodes = perft(GameState(getStartingBoard(), 'X'), depth)
+        seconds = time.perf_counter() - start_time
+
+        expected = PERFT_RESULTS.get(depth) if (WIDTH, HEIGHT) == (8, 8) else None
+        correct = expected is None or nodes == expected
+        all_correct = all_correct and correct
+        nodes_per_second = nodes / seconds if seconds > 0 else 0
+        if expected is None:
+            status = 'no reference'
+        elif correct:
+            status = 'ok'
+        else:
+            status = f'WRONG, expected {expected}'
+        print(f'depth {depth:2}: {nodes:12} nodes {seconds:9.3f}s {nodes_per_second:12.0f} nodes/s  {status}')
+        results.append({'depth': depth, 'nodes': nodes, 'expected': expected, 'correct': correct,
+                        'seconds': seconds, 'nodes_per_second': nodes_per_second})
+
+    if json_path is not None:
+        with open(json_path, 'w') as json_file:
+            json.dump({'engine': engine, 'width': WIDTH, 'height': HEIGHT, 'python': sys.version.split()[0],
+                       'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results},
+                      json_file, indent=2)
+    return all_correct
+
+# Headless games: computer players are functions taking (board, tile, rng)
+# and returning [x, y], so whole games can be played without any input or
+# output, and many at once in a process pool.
+def getMoveFunction(spec):
+    '''Return the move function for a computer player described by spec:
+    'random', 'greedy', 'search:DEPTH' or 'search:DEPTH:MAX_NODES'. greedy
+    and search players can add ':endgame' to play the last ENDGAME_EMPTIES
+    moves with the endgame solver (or ':endgame=EMPTIES' for another number),
+    which gets ENDGAME_MAX_NODES positions rather than a time limit, and
+    ':book' to play opening book moves. Neither is used unless asked for, so
+    results don't change with whether reversegam_book.bin exists.
+    Each search player gets its own transposition table, so a game's moves
+    only depend on its random seed.'''
+    name, *options = spec.split(':')
+    numbers = []
+    endgame_empties = 0
+    use_book = False
+    try:
+        for option in options:
+            if option == 'book':
+                use_book = True
+            elif option == 'endgame':
+                endgame_empties = ENDGAME_EMPTIES
+            elif option.startswith('endgame='):
+                endgame_empties = int(option[len('endgame='):])
+            else:
+                numbers.append(int(option))
+    except ValueError:
+        numbers = None
+    if name == 'random' and options == []:
+        return lambda board, tile, rng: rng.choice(getValidMoves(board, tile))
+    if name == 'greedy' and numbers == []:
+        return lambda board, tile, rng: getComputerMove(board, tile, rng=rng, endgame_empties=endgame_empties,
+                                                        use_book=use_book, endgame_max_nodes=ENDGAME_MAX_NODES)
+    if name == 'search' and numbers is not None and 1 <= len(numbers) <= 2:
+        search_depth = numbers[0]
+        max_nodes = numbers[1] if len(numbers) == 2 else None
+        table = TranspositionTable(16)
+        return lambda board, tile, rng: getComputerMove(board, tile, search_depth, max_nodes, rng, table,
+                                                        endgame_empties, use_book,
+                                                        endgame_max_nodes=ENDGAME_MAX_NODES)
+    raise ValueError(f'Unknown player {spec!r}. Use random, greedy, search:DEPTH or search:DEPTH:MAX_NODES, '
+                     'optionally followed by :endgame, :endgame=EMPTIES and :book.')
+
+def playHeadlessGame(x_move_function, o_move_function, rng, opening_moves=0, moves=None):
+    '''Play a whole game between two move functions, X moving first.
+    The first opening_moves moves are chosen at random with rng so that
+    games between the same players differ. If moves is a list, each move
+    played is appended to it. Return the final board.'''
+    board = getStartingBoard()
+    move_functions = {'X': x_move_function, 'O': o_move_function}
+    tile = 'X'
+    moves_played = 0
+    while True:
+        other_tile = 'O' if tile == 'X' else 'X'
+        valid_moves = getValidMoves(board, tile)
+        if valid_moves == []:
+            if getValidMoves(board, other_tile) == []:
+                return board  # No one can move, so end the game.
+        else:
+            if moves_played < opening_moves:
+                move = rng.choice(valid_moves)
+            else:
+                move = move_functions[tile](board, tile, rng)
+            makeMove(board, tile, move[0], move[1])
+            moves_played += 1
+            if moves is not None:
+                moves.append(move)
+        tile = other_tile
+
+def playTournamentGame(game):
+    '''Play one tournament game, given as a (game_number, player_a, player_b,
+    seed, opening_moves) tuple. Player A is X in even-numbered games and O in
+    odd ones. Return (game_number, player A's discs, player B's discs, moves).'''
+    game_number, player_a, player_b, seed, opening_moves = game
+    rng = random.Random(seed)
+    a_move_function = getMoveFunction(player_a)
+    b_move_function = getMoveFunction(player_b)
+    moves = []
+    if game_number % 2 == 0:
+        scores = getScoreOfBoard(playHeadlessGame(a_move_function, b_move_function, rng, opening_moves, moves))
+        return game_number, scores['X'], scores['O'], moves
+    scores = getScoreOfBoard(playHeadlessGame(b_move_function, a_move_function, rng, opening_moves, moves))
+    return game_number, scores['O'], scores['X'], moves
+
+def runTournament(player_a, player_b, games, workers=None, seed=0, opening_moves=4, record_path=None):
+    '''Play games between player_a and player_b across a pool of worker
+    processes (one per core by default), printing the running results about
+    once a second. Game i uses the random seed seed + i. If record_path is
+    given, each game's moves are written there as a game record line.
+    Return a dictionary of player A's wins, losses, draws and total disc lead.'''
+    getMoveFunction(player_a)  # Check both player specs before starting the pool.
+    getMoveFunction(player_b)
+    tasks = [(i, player_a, player_b, seed + i, opening_moves) for i in range(games)]
+    stats = {'games': 0, 'wins': 0, 'losses': 0, 'draws': 0, 'disc_difference': 0}
+    start_time = time.perf_counter()
+    last_report = start_time
+    record_file = open(record_path, 'w') if record_path is not None else None
+
+    with multiprocessing.Pool(workers, setBoardSize, (WIDTH, HEIGHT)) as pool:
+        for game_number, a_discs, b_discs, moves in pool.imap_unordered(playTournamentGame, tasks):
+            if record_file is not None:
+                record_file.write(formatGameRecord(moves) + '\n')
+            stats['games'] += 1
+            stats['disc_difference'] += a_discs - b_discs
+            if a_discs > b_discs:
+                stats['wins'] += 1
+            elif a_discs < b_discs:
+                stats['losses'] += 1
+            else:
+                stats['draws'] += 1
+
+            now = time.perf_counter()
+            if now - last_report >= 1 or stats['games'] == games:
+                last_report = now
+                print(f"{stats['games']}/{games} games: {player_a} won {stats['wins']}, "
+                      f"lost {stats['losses']}, drew {stats['draws']} against {player_b}, "
+                      f"average disc lead {stats['disc_difference'] / stats['games']:+.2f} "
+                      f"({stats['games'] / (now - start_time):.1f} games/s)")
+    if record_file is not None:
+        record_file.close()
+    return stats
+
+# Parallel search: the root moves are shared out to worker processes. Each
+# worker keeps its own transposition table between searches, and each root
+# move goes to the same worker at every depth so that table holds what the
+# last depth found below it. The best root score found so far is kept in
+# shared memory so that every move searched after it can use it as its alpha
+# bound, and the first move is searched on its own so the rest start with one.
+PARALLEL_SEARCH = None  # The ParallelSearch getComputerMove() uses, once it has made one.
+SHARED_ALPHA = None  # In a worker process, the shared best root score.
+
+def initParallelSearchWorker(width, height, shared_alpha):
+    global SHARED_ALPHA
+    setBoardSize(width, height)
+    SHARED_ALPHA = shared_alpha
+
+def searchRootMove(task):
+    '''Search one root move in a worker process. task is (board, tile, move,
+    depth, max_nodes, deadline), where deadline is a time.time() value or None.
+    Return (move, score, nodes, alpha), with score None if the search ran out
+    of nodes or time. alpha is the shared alpha the move was searched with,
+    and a score at or below it is only an upper bound.'''
+    board, tile, move, depth, max_nodes, deadline = task
+    search = AlphaBetaSearch(TRANSPOSITION_TABLE, max_nodes)
+    if deadline is not None:
+        search.deadline = time.perf_counter() + deadline - time.time()
+    state = GameState(board, tile)
+    state.makeMove(1 << (move[0] * HEIGHT + move[1]))
+    alpha = SHARED_ALPHA.value
+    try:
+        score = -search.negamax(state, depth - 1, -INFINITY, -alpha)
+    except SearchAborted:
+        return move, None, search.nodes, alpha
+    if score > alpha:
+        with SHARED_ALPHA.get_lock():
+            if score > SHARED_ALPHA.value:
+                SHARED_ALPHA.value = score
+    return move, score, search.nodes, alpha
+
+class ParallelSearch:
+    '''Root-parallel iterative-deepening search over worker processes.
+    max_nodes applies to each root move's search separately.
+    Call close() when done with it.'''
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count()
+        self.shared_alpha = multiprocessing.Value('q', -INFINITY)
+        # A one-process pool for each worker, so each search can be sent to the worker of its choice.
+        self.pools = [multiprocessing.Pool(1, initParallelSearchWorker, (WIDTH, HEIGHT, self.shared_alpha))
+                      for i in range(self.workers)]
+        self.nodes = 0
+
+    def searchMoves(self, tasks, owners):
+        '''Send each searchRootMove() task to the worker that owns its move,
+        as owners (a dictionary of (x, y) to worker number) says, and yield
+        the results as they finish.'''
+        results = queue.Queue()
+        for task in tasks:
+            self.pools[owners[tuple(task[2])]].apply_async(searchRootMove, (task,), callback=results.put,
+                                                           error_callback=results.put)
+        for i in range(len(tasks)):
+            result = results.get()
+            if isinstance(result, BaseException):
+                raise result
+            yield result
+
+    def getBestMove(self, board, tile, max_depth, max_nodes=None, time_limit=None):
+        '''Search the board for tile one depth at a time up to max_depth.
+        Return [[x, y], score, depth] for the deepest search that finished.'''
+        start_time = time.time()
+        deadline = None if time_limit is None else start_time + time_limit
+        moves = getValidMoves(board, tile)
+        moves.sort(key=lambda move: SQUARE_WEIGHTS[move[0]][move[1]], reverse=True)
+        owners = {tuple(move): number % self.workers for number, move in enumerate(moves)}
+        best_move = moves[0]
+        best_score = None
+        depth_done = 0
+        for depth in range(1, max_depth + 1):
+            if depth > 1 and deadline is not None and time.time() - start_time > TIME_USE_FRACTION * time_limit:
+                break  # The next depth would most likely not finish in time.
+            self.shared_alpha.value = -INFINITY
+            # Search the previous best move first, on its own, so the others all get a good alpha.
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+            tasks = [(board, tile, move, depth, max_nodes, deadline) for move in moves]
+            depth_best_move = None
+            depth_best_score = -INFINITY
+            depth_best_exact = False
+            finished = True
+            for batch in [tasks[:1], tasks[1:]]:
+                for move, score, nodes, alpha in self.searchMoves(batch, owners):
+                    self.nodes += nodes
+                    if score is None:
+                        finished = False
+                    # A score that failed low is only an upper bound, so it can
+                    # never beat an exact score it ties with.
+                    elif (score, score > alpha) > (depth_best_score, depth_best_exact):
+                        depth_best_move = move
+                        depth_best_score = score
+                        depth_best_exact = score > alpha
+                if not finished:
+                    break
+            if not finished:
+                break
+            best_move, best_score, depth_done = depth_best_move, depth_best_score, depth
+        return [best_move, best_score, depth_done]
+
+    def close(self):
+        for pool in self.pools:
+            pool.close()
+            pool.join()
+
+def getParallelSearch(workers):
+    # Return a ParallelSearch with this many workers, reusing the last one if it matches.
+    global PARALLEL_SEARCH
+    if PARALLEL_SEARCH is not None and PARALLEL_SEARCH.workers != workers:
+        PARALLEL_SEARCH.close()
+        PARALLEL_SEARCH = None
+    if PARALLEL_SEARCH is None:
+        PARALLEL_SEARCH = ParallelSearch(workers)
+    return PARALLEL_SEARCH
+
+def runParallelBenchmark(depth, workers=None, positions=4, seed=0):
+    '''Search some positions from seeded random games with one worker and
+    then with workers worker processes, each with empty tables, and print
+    how long both took. Return the speedup of the parallel search.'''
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < positions:
+        board = getStartingBoard()
+        tile = 'X'
+        for i in range(rng.randint(10, 20)):
+            valid_moves = getValidMoves(board, tile)
+            if valid_moves != []:
+                makeMove(board, tile, *rng.choice(valid_moves))
+            tile = 'O' if tile == 'X' else 'X'
+        if getValidMoves(board, tile) != []:
+            boards.append((board, tile))
+
+    parallel_search = ParallelSearch(workers)
+    try:
+        serial_seconds = 0
+        parallel_seconds = 0
+        for number, (board, tile) in enumerate(boards, 1):
+            serial_search = AlphaBetaSearch(TranspositionTable())
+            start_time = time.perf_counter()
+            serial_move, serial_score, serial_depth = serial_search.getBestMove(board, tile, depth)
+            serial_time = time.perf_counter() - start_time
+
+            parallel_search.nodes = 0
+            start_time = time.perf_counter()
+            parallel_move, parallel_score, parallel_depth = parallel_search.getBestMove(board, tile, depth)
+            parallel_time = time.perf_counter() - start_time
+
+            serial_seconds += serial_time
+            parallel_seconds += parallel_time
+            print(f'position {number}: 1 worker {serial_time:.2f}s ({serial_search.nodes} nodes), '
+                  f'{parallel_search.workers} workers {parallel_time:.2f}s ({parallel_search.nodes} nodes), '
+                  f'scores {serial_score} and {parallel_score}')
+    finally:
+        parallel_search.close()
+    speedup = serial_seconds / parallel_seconds
+    print(f'Total: 1 worker {serial_seconds:.2f}s, {parallel_search.workers} workers {parallel_seconds:.2f}s, '
+          f'speedup {speedup:.2f}x')
+    return speedup
+
+# Game analysis. A game record is one line of text listing the moves in
+# order, each as the column and row the player would type (like 53, or 5,3
+# on boards bigger than 9); passes happen automatically and may also be
+# written as "pass". Blank lines and lines starting with # are skipped.
+ANALYSIS_DEPTH = 4  # How deep each position of an analyzed game is searched.
+BLUNDER_LOSS = 100  # A move scoring this much worse than the best move is a blunder.
+
+def formatGameRecord(moves):
+    # Return the game record line for a list of [x, y] moves.
+    separator = '' if WIDTH <= 9 and HEIGHT <= 9 else ','
+    return ' '.join(f'{x + 1}{separator}{y + 1}' for x, y in moves)
+
+def parseGameRecord(line):
+    # Return the list of [x, y] moves in a game record line. Raise ValueError if it can't be read.
+    moves = []
+    for word in line.split():
+        if word.lower() == 'pass':
+            continue
+        numbers = word.split(',') if ',' in word else list(word)
+        if len(numbers) != 2 or not numbers[0].isdigit() or not numbers[1].isdigit():
+            raise ValueError(f'{word!r} is not a move')
+        moves.append([int(numbers[0]) - 1, int(numbers[1]) - 1])
+    return moves
+
+def readGameRecords(path):
+    # Yield (game_number, line) for each game record in the file, one line at a time.
+    with open(path) as records_file:
+        game_number = 0
+        for line in records_file:
+            line = line.strip()
+            if line == '' or line.startswith('#'):
+                continue
+            yield game_number, line
+            game_number += 1
+
+def analyzeMove(state, move, search, depth):
+    '''Search the GameState, whose side to move is about to play the move
+    bit, to depth. Return (best move bit, best score, score of move), all
+    exact: the played move is searched with a full window first, and every
+    other move only has to beat it.'''
+    state.makeMove(move)
+    played_score = -search.negamax(state, depth - 1, -INFINITY, INFINITY)
+    state.undoMove()
+    best_move = move
+    best_score = played_score
+    for other_move in search.orderMoves(state.getValidMovesBits() ^ move, 0):
+        state.makeMove(other_move)
+        score = -search.negamax(state, depth - 1, -INFINITY, -best_score)
+        state.undoMove()
+        if score > best_score:
+            best_move = other_move
+            best_score = score
+    return best_move, best_score, played_score
+
+def analyzeGame(game):
+    '''Replay one game, given as (game_number, record line, depth), and score
+    every move against the best move. Return a dictionary of the results,
+    with an 'error' entry instead if the record has an invalid move.'''
+    game_number, line, depth = game
+    try:
+        moves = parseGameRecord(line)
+    except ValueError as error:
+        return {'game': game_number, 'error': str(error)}
+
+    board = getStartingBoard()
+    tile = 'X'
+    search = AlphaBetaSearch(TranspositionTable(16))
+    analyzed_moves = []
+    blunders = {'X': 0, 'O': 0}
+    for ply, (x, y) in enumerate(moves, 1):
+        if getValidMoves(board, tile) == []:
+            tile = 'O' if tile == 'X' else 'X'  # The player to move had to pass.
+        if not isOnBoard(x, y) or isValidMove(board, tile, x, y) == False:
+            return {'game': game_number, 'error': f'move {ply} ({x + 1},{y + 1}) is not valid for {tile}'}
+
+        state = GameState(board, tile)
+        best_move, best_score, score = analyzeMove(state, 1 << (x * HEIGHT + y), search, depth)
+        best_index = best_move.bit_length() - 1
+        loss = best_score - score
+        if loss >= BLUNDER_LOSS:
+            blunders[tile] += 1
+        analyzed_moves.append({'ply': ply, 'tile': tile, 'move': [x, y],
+                               'best_move': [best_index // HEIGHT, best_index % HEIGHT],
+                               'score': score, 'best_score': best_score, 'loss': loss,
+                               'blunder': loss >= BLUNDER_LOSS,
+                               'mobility': countBits(state.getValidMovesBits())})
+        makeMove(board, tile, x, y)
+        tile = 'O' if tile == 'X' else 'X'
+    return {'game': game_number, 'moves': analyzed_moves, 'blunders': blunders,
+            'final_score': getScoreOfBoard(board)}
+
+def analyzeGames(records_path, output_path, depth=ANALYSIS_DEPTH, workers=None):
+    '''Analyze every game in records_path across a pool of worker processes
+    and write one JSON line of results per game to output_path, in the same
+    order as the games. Games are read and results written as the work goes,
+    with only a few games per worker in flight at once, so memory use stays
+    the same however big the file is. Return the number of games analyzed.'''
+    start_time = time.perf_counter()
+    games = 0
+    errors = 0
+    with multiprocessing.Pool(workers, setBoardSize, (WIDTH, HEIGHT)) as pool, \
+         open(output_path, 'w') as output_file:
+        max_pending = 4 * (workers or os.cpu_count())
+        pending = collections.deque()
+
+        def writeResult(result):
+            nonlocal games, errors
+            output_file.write(json.dumps(result) + '\n')
+            games += 1
+            if 'error' in result:
+                errors += 1
+            if games % 100 == 0:
+                print(f'{games} games analyzed ({games / (time.perf_counter() - start_time):.1f} games/s)')
+
+        for game_number, line in readGameRecords(records_path):
+            pending.append(pool.apply_async(analyzeGame, ((game_number, line, depth),)))
+            if len(pending) >= max_pending:
+                writeResult(pending.popleft().get())
+        while pending:
+            writeResult(pending.popleft().get())
+
+    print(f'Analyzed {games} games ({errors} with errors) in {time.perf_counter() - start_time:.1f}s.')
+    return games
+
+def playInteractive(ponder=False, workers=1):
+    # Start the game loop.
+    print('Welcome to Reversegam!')
+    player_tile, computer_tile = enterPlayerTile()
+    while True:
+        final_board = playGame(player_tile, computer_tile, ponder, workers)
+
+        # Display the final score.
+        drawBoard(final_board)
+        scores = getScoreOfBoard(final_board)
+        print('X scored %s points. O scored %s points.' % (scores['X'], scores['O']))
+        if scores[player_tile] > scores[computer_tile]:
+            print(f'You beat the computer by {scores[player_tile] - scores[computer_tile]} points! Congratulations!')
+        elif scores[player_tile] < scores[computer_tile]:
+            print(f'You lost :( The computer beat you by {scores[computer_tile] - scores[player_tile]}.')
+        else:
+            print('The game was a tie!')
+
+        print('Do you want to play again? (yes or no)')
+        if not input().lower().startswith('y'):
+            break
+
+def parseBoardSize(text):
+    # Turn a --size argument like '10' or '10x8' into a (width, height) tuple.
+    try:
+        sizes = [int(size) for size in text.lower().split('x')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{text!r} is not a board size like 10 or 10x8')
+    if len(sizes) == 1:
+        sizes *= 2
+    if len(sizes) != 2:
+        raise argparse.ArgumentTypeError(f'{text!r} is not a board size like 10 or 10x8')
+    return tuple(sizes)
+
+def main():
+    parser = argparse.ArgumentParser(description='Reversegam: a clone of Othello/Reversi.')
+    parser.add_argument('--size', type=parseBoardSize, default=(WIDTH, HEIGHT),
+                        help=f'board size, like 10 or 10x8 (default {WIDTH}x{HEIGHT})')
+    parser.add_argument('--ponder', action='store_true',
+                        help="let the computer think during the player's turn (needs --search-workers 1)")
+    parser.add_argument('--search-workers', type=int, default=1,
+                        help='worker processes the computer searches with (default 1)')
+    subparsers = parser.add_subparsers(dest='command')
+    perft_parser = subparsers.add_parser('perft', help='count move-generator leaf nodes and time them')
+    perft_parser.add_argument('depth', type=int, nargs='?', default=6, help='deepest depth to count (default 6)')
+    perft_parser.add_argument('--engine', choices=['state', 'board'], default='state',
+                              help='count with GameState (default) or the getValidMoves/makeMove board functions')
+    perft_parser.add_argument('--json', metavar='PATH', help='also write the results to PATH as JSON')
+    tournament_parser = subparsers.add_parser('tournament', help='play computer players against each other')
+    tournament_parser.add_argument('player_a', help='random, greedy, search:DEPTH or search:DEPTH:MAX_NODES, '
+                                   'optionally followed by :endgame and :book')
+    tournament_parser.add_argument('player_b', help='random, greedy, search:DEPTH or search:DEPTH:MAX_NODES, '
+                                   'optionally followed by :endgame and :book')
+    tournament_parser.add_argument('--games', type=int, default=1000, help='number of games (default 1000)')
+    tournament_parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    tournament_parser.add_argument('--seed', type=int, default=0, help='random seed of the first game (default 0)')
+    tournament_parser.add_argument('--opening-moves', type=int, default=4,
+                                   help='random moves played at the start of each game (default 4)')
+    tournament_parser.add_argument('--record', metavar='PATH', help='write the moves of every game to PATH')
+    book_parser = subparsers.add_parser('book', help='build the opening book file')
+    book_parser.add_argument('--depth', type=int, default=BOOK_DEPTH,
+                             help=f'book positions up to this many moves in (default {BOOK_DEPTH})')
+    book_parser.add_argument('--search-depth', type=int, default=BOOK_SEARCH_DEPTH,
+                             help=f'search depth for each reply (default {BOOK_SEARCH_DEPTH})')
+    book_parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    book_parser.add_argument('--output', default=OPENING_BOOK_PATH, help='book file to write')
+    bench_parser = subparsers.add_parser('parallel-bench', help='compare parallel search with a single worker')
+    bench_parser.add_argument('depth', type=int, nargs='?', default=6, help='search depth (default 6)')
+    bench_parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    bench_parser.add_argument('--positions', type=int, default=4, help='positions to search (default 4)')
+    bench_parser.add_argument('--seed', type=int, default=0, help='random seed for the positions (default 0)')
+    analyze_parser = subparsers.add_parser('analyze', help='score every move of recorded games')
+    analyze_parser.add_argument('records', help='file of game records, one game per line')
+    analyze_parser.add_argument('output', help='file to write one JSON line of results per game to')
+    analyze_parser.add_argument('--depth', type=int, default=ANALYSIS_DEPTH,
+                                help=f'search depth for each position (default {ANALYSIS_DEPTH})')
+    analyze_parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    args = parser.parse_args()
+    try:
+        setBoardSize(*args.size)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.ponder and args.search_workers > 1:
+        parser.error('--ponder needs --search-workers 1, because workers have their own transposition tables')
+
+    if args.command == 'perft':
+        if not runPerft(args.depth, args.engine, args.json):
+            sys.exit(1)
+    elif args.command == 'tournament':
+        try:
+            runTournament(args.player_a, args.player_b, args.games, args.workers, args.seed, args.opening_moves,
+                          args.record)
+        except ValueError as error:
+            parser.error(str(error))
+    elif args.command == 'book':
+        entries = writeOpeningBook(args.output, args.depth, args.search_depth, args.workers)
+        print(f'Wrote {entries} positions to {args.output}.')
+    elif args.command == 'analyze':
+        analyzeGames(args.records, args.output, args.depth, args.workers)
+    elif args.command == 'parallel-bench':
+        runParallelBenchmark(args.depth, args.workers, args.positions, args.seed)
+    else:
+        playInteractive(args.ponder, args.search_workers)
 
+if __name__ == '__main__':
+    main()